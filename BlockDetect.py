@@ -1,13 +1,29 @@
 import cv2
 import numpy as np
-from picamera2 import Picamera2
-from gpiozero import Motor,Robot,LED 
-import RPi.GPIO as GPIO
 from time import sleep
 import time as time
-import serial
+from serial_channel import CommandError
+from frame_protocol import servo_frame
+from roi_tracker import RoiTracker
+from pyramid_detect import detect_color, downscale
+from frame_pipeline import FramePipeline
+from yuv_detect import YuvClassifier, lores_config
+from color_lut import ColorLUT
+from scene_map import SceneMap
+from ranging import get_ranging
+from stage_timing import StageTimes
+from frame_dataset import FrameDatasetWriter
 
-ser = serial.Serial('/dev/ttyACM0', 115200, timeout=1)
+# Hardware (camera, serial, GPIO) is only opened when run as a script, so the
+# detection functions below can be imported and benchmarked off the robot.
+
+# Commands are newline-terminated; each returns a Future that resolves on the
+# micro:bit's ack:/err: reply (or times out after REPLY_TIMEOUT seconds)
+REPLY_TIMEOUT = 3
+
+# Pan the head with binary frames (servoMotor.py firmware) instead of "H<angle>" text
+USE_FRAMES = False
+PAN_SERVO = 1   # servoMotor.py servo number: 1->P13, 2->P14, 3->P15
 
 # Define your color ranges
 green_lower = np.array([40,170,90], np.uint8)
@@ -19,34 +35,92 @@ red_upper = np.array([180,255,255], np.uint8)
 blue_lower = np.array([94,185,170], np.uint8)
 blue_upper = np.array([120,255,255], np.uint8)
 
-# Initialize PiCamera
-picam2 = Picamera2()
-picam2.preview_configuration.main.size = (1280, 720)
-picam2.preview_configuration.main.format = "RGB888"
-picam2.preview_configuration.align()
-picam2.configure("preview")
-picam2.start()
+# Red also sits at the bottom of the hue circle; red_lower..red_upper only covers the top
+red_wrap_lower = np.array([0,87,111], np.uint8)
+red_wrap_upper = np.array([10,255,255], np.uint8)
+
+# Colors searched by the scan: (name, lower, upper, message tag)
+scan_colors = [
+	("Green", green_lower, green_upper, "G"),
+	("Red", red_lower, red_upper, "R"),
+	("Blue", blue_lower, blue_upper, "B"),
+]
+
+# Every HSV box of each color, compiled into one lookup table (color_lut.py)
+color_profiles = {
+	"Green": [(green_lower, green_upper)],
+	"Red": [(red_lower, red_upper), (red_wrap_lower, red_wrap_upper)],
+	"Blue": [(blue_lower, blue_upper)],
+}
+
+SCAN_MODE = "sweep"   # "sweep" (one pan for every color) | "sequential" (one pan per color)
+SWEEP_STEP = 30       # degrees between frames while sweeping (about half the FOV)
+SWEEP_ANGLES = list(range(0, 181, SWEEP_STEP))
+SEARCH_STEP = 30      # degrees to jump when centering sees nothing
+
+# Centering controller
+FRAME_WIDTH = 1280        # must match the camera main size below
+MAIN_SIZE = (FRAME_WIDTH, 720)
+FOV_HORIZONTAL = 62.2     # Raspberry Pi Camera v2 horizontal FOV (deg)
+CENTER_BAND = (500, 700)  # block center x counted as centered
+CENTER_GAIN = 0.8         # <1 to avoid overshooting on servo backlash
+CENTER_MAX_FRAMES = 6
+DETECT_MODE = "full"      # "full": blur + detect the whole frame | "pyramid": find blobs on a
+                          # PYRAMID_SCALE copy, then refine on full-resolution crops
+                          # | "lores": classify the camera's small YUV stream directly
+PYRAMID_SCALE = 0.25
+LORES_SIZE = (640, 360)   # YUV420 side stream; boxes still come out in FRAME_WIDTH pixels
+# Per-stage latency histograms (capture, flip, blur, classify, mask, contours, serial, servo),
+# rewritten every TIMING_EVERY seconds; .prom is Prometheus text, anything else JSON
+TIMING_FILE = "blockdetect_timings.prom"
+TIMING_EVERY = 10
+timings = StageTimes(TIMING_FILE, TIMING_EVERY, prefix="blockdetect")
+# Orientation and blur buffers are allocated once and reused every frame.
+# The pyramid detector works on the oriented frame only.
+pipeline = FramePipeline(blur=(DETECT_MODE == "full"), hsv=False, timer=timings)
+KERNEL = pipeline.kernel   # 5x5 dilation kernel, built once
+# Pixel -> color bits for every scan color at once: BGR frames and the lores YUV stream
+color_lut = ColorLUT(color_profiles, "BGR")
+yuv_classifier = YuvClassifier(color_profiles)
+# Bottom row of a block -> distance (inches) and column -> bearing, precomputed for MAIN_SIZE
+ranger = get_ranging("blockdetect", MAIN_SIZE, FOV_HORIZONTAL)
+TRACK_ROI = True          # after the first frame, only search a window around the predicted block
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(17,GPIO.IN)
-GPIO.setup(27,GPIO.IN)
+# Append every sweep frame with its servo angle and detections to a frame_dataset.py
+# dataset for offline analysis, e.g. "runs/blockdetect"; None records nothing
+DATASET_DIR = None
+dataset = None
 
+# Servo angle -> what was seen there (scene_map.py). A scan cycle first re-checks the
+# angles where the map places each color (one frame each) and only sweeps for the
+# colors it cannot answer. Entries older than SCENE_MAX_AGE seconds are looked at
+# again; SCENE_FILE keeps the map between runs (None keeps it in memory only).
+SCENE_MAX_AGE = 120
+SCENE_FILE = "blockdetect_scene.npz"
+RESCAN_EVERY = None   # seconds between scan cycles after the first; None scans once
+scene = SceneMap(SCENE_MAX_AGE)
+
+servo_moved_at = time.monotonic()   # frames captured before this show the old angle
 
 ###########################################################################Defining Functions#######################################################################
 
 def detect_single_color(imageFrame, color_name, lower_range, upper_range, color_display):
+    with timings.stage("hsv"):
+        hsvFrame = cv2.cvtColor(imageFrame, cv2.COLOR_BGR2HSV)
+    return detect_in_hsv(imageFrame, hsvFrame, color_name, lower_range, upper_range, color_display)
+
+def detect_in_hsv(imageFrame, hsvFrame, color_name, lower_range, upper_range, color_display):
+    # Same as detect_single_color but reuses an HSV frame that was already converted
     x=0
     y=0
     w=0
     h=0
-    hsvFrame = cv2.cvtColor(imageFrame, cv2.COLOR_BGR2HSV)
-    color_mask = cv2.inRange(hsvFrame, lower_range, upper_range)
-
-    kernel = np.ones((5, 5), "uint8")
-    color_mask = cv2.dilate(color_mask, kernel)
-    result = cv2.bitwise_and(imageFrame, imageFrame, mask=color_mask)
+    with timings.stage("mask"):
+        color_mask = cv2.inRange(hsvFrame, lower_range, upper_range)
+        color_mask = cv2.dilate(color_mask, KERNEL)
 
-    contours, hierarchy = cv2.findContours(color_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    with timings.stage("contours"):
+        contours, hierarchy = cv2.findContours(color_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
 
     for pic, contour in enumerate(contours):
         area = cv2.contourArea(contour)
@@ -58,55 +132,285 @@ def detect_single_color(imageFrame, color_name, lower_range, upper_range, color_
 
     return imageFrame,x,y,w,h
 
-def cntr_colorH(color,color_lower,color_upper):
-	xc=0
-	wc=0
-	angle = 90
-	while(xc == 0 and wc == 0):
+def detect_in_codes(codes, color_name):
+	# detect_in_hsv for color_lut.classify() output: last blob over 800 px as (x,y,w,h), or None
+	with timings.stage("mask"):
+		color_mask = cv2.dilate(color_lut.mask(codes, color_name), KERNEL)
+	with timings.stage("contours"):
+		contours, hierarchy = cv2.findContours(color_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+	box = None
+	for contour in contours:
+		if cv2.contourArea(contour) > 800:
+			box = cv2.boundingRect(contour)
+	return box
+
+def prepare_frame(im):
+	# Camera is mounted upside down: flip both ways (one step), then blur.
+	# The pyramid detector only blurs the crops it refines, so it skips the full-frame work.
+	# Returns the pipeline's buffer, which is reused by the next call.
+	return pipeline.prepare(im)
+
+def color_detector(color,color_lower,color_upper):
+	# detect_single_color (or the pyramid detector) as a detect function for RoiTracker: (x,y,w,h) or None
+	def detect(frame):
+		if DETECT_MODE == "lores":
+			with timings.stage("classify"):
+				return yuv_classifier.detect(frame, color, MAIN_SIZE, flip_code=-1)
+		if DETECT_MODE == "pyramid":
+			with timings.stage("pyramid"):
+				return detect_color(frame, color_lower, color_upper, PYRAMID_SCALE, lut=color_lut, label=color)
+		with timings.stage("classify"):
+			codes = color_lut.classify(frame)
+		return detect_in_codes(codes, color)
+	return detect
+
+def capture_frame():
+	# Newest frame whose capture started after the last servo move, ready for detection
+	# (in lores mode: the raw YUV420 buffer, which is classified as is)
+	with timings.stage("capture"):
+		im,seq,stamp = grabber.latest(after=servo_moved_at)
+	timings.count("frames")
+	timings.maybe_export()
+	if DETECT_MODE == "lores":
+		return im
+	return prepare_frame(im)
+
+def capture_main():
+	# Full-resolution frame for display or measurement; in lores mode this is
+	# the only place the main stream is read
+	if DETECT_MODE == "lores":
+		return prepare_frame(picam2.capture_array("main"))
+	return capture_frame()
+
+def lores_box(box):
+	# Main-stream box from a flipped lores detection -> the same box on the raw
+	# (unflipped) LORES_SIZE buffer
+	x,y,w,h = box
+	sx = LORES_SIZE[0] / MAIN_SIZE[0]
+	sy = LORES_SIZE[1] / MAIN_SIZE[1]
+	return (int(round((MAIN_SIZE[0]-x-w)*sx)), int(round((MAIN_SIZE[1]-y-h)*sy)),
+		int(round(w*sx)), int(round(h*sy)))
+
+def record_frame(frame, angle, detections):
+	# Raw (oriented, unblurred) frame with main-stream boxes, or in lores mode the
+	# YUV buffer as captured with its boxes moved onto it, so the saved boxes
+	# always cover the saved pixels
+	if dataset is None:
+		return
+	if DETECT_MODE == "lores":
+		dataset.append(frame, angle=angle, detections=[(name, lores_box(box)) for name,box in detections])
+	else:
+		dataset.append(pipeline.oriented, angle=angle, detections=detections)
+
+def scene_view(frame):
+	# What the scene map keeps a thumbnail of: the frame, or the Y plane of a lores buffer
+	if DETECT_MODE == "lores":
+		return frame[:frame.shape[0] * 2 // 3]
+	return frame
+
+def angle_correction(block_center):
+	# Turn the block's pixel offset from the center band into a servo correction (degrees).
+	# A block on the right (larger x) needs a smaller servo angle.
+	offset = ranger.bearing(block_center) - ranger.bearing((CENTER_BAND[0] + CENTER_BAND[1]) / 2)
+	return -CENTER_GAIN * float(offset)
+
+def estimate_angle(angle, box):
+	# Servo angle that should center a block seen at box from angle
+	xc,yc,wc,hc = box
+	return min(180, max(0, int(round(angle + angle_correction(xc + wc/2)))))
+
+def center_on_block(color,color_lower,color_upper,angle):
+	# Proportional centering starting from the given servo angle.
+	# Returns yc,hc,angle,frames,elapsed; hc is 0 when the block is not in view.
+	start = time.time()
+	frames = 0
+	yc=0
+	hc=0
+	detect = color_detector(color,color_lower,color_upper)
+	tracker = RoiTracker(detect)
+	while frames < CENTER_MAX_FRAMES:
 		set_servo("H",angle)
-		im = picam2.capture_array()
-		im = cv2.flip(im,0)
-		im = cv2.flip(im,1)
-		blur_image = cv2.GaussianBlur(im,(7,7),0)
-		result_frame,xc,yc,wc,hc = detect_single_color(blur_image, color, color_lower, color_upper, (0, 255, 0))
+		blur_image = capture_frame()
+		frame_angle = angle
+		frames=frames+1
+		# The lores frame is already small, and its coordinates are not the tracker's
+		box = tracker.update(blur_image) if TRACK_ROI and DETECT_MODE != "lores" else detect(blur_image)
+		if box is None:
+			yc=0
+			hc=0
+			break
+		xc,yc,wc,hc = box
 		block_center = xc + wc/2
-		
-		if block_center >= 700 and angle>0:
-			angle=angle-5
-			set_servo("H",angle)
-			print("Block detected on right, panning right")
-			xc=0
-			wc=0
-		elif block_center>500 and block_center<700:
+		if block_center>CENTER_BAND[0] and block_center<CENTER_BAND[1]:
 			print("Block detected in center")
-		else:
-			angle=angle+5
-			set_servo("H",angle)
-			print("Block detected on left, panning left")
-			xc=0
-			wc=0
-		if angle==180:
+			break
+		new_angle = int(round(angle + angle_correction(block_center)))
+		new_angle = min(180, max(0, new_angle))
+		if new_angle == angle:
+			# Servo is at its limit; this is as centered as it gets
+			break
+		print("Block at x="+str(int(block_center))+", panning to "+str(new_angle))
+		# The pan moves the whole scene sideways; let the tracker expect it
+		tracker.shift((new_angle-angle)*FRAME_WIDTH/FOV_HORIZONTAL, 0)
+		angle = new_angle
+	# Where the block was (or that it was not there) for the next scan cycle
+	scene.update(frame_angle, [] if hc == 0 else [(color, box)], scene_view(blur_image), labels=[color])
+	elapsed = time.time()-start
+	print(f"Centering {color}: {frames} frames, {elapsed:.2f} s")
+	return yc,hc,angle,frames,elapsed
+
+def cntr_colorH(color,color_lower,color_upper):
+	angle = 90
+	while True:
+		yc,hc,angle,frames,elapsed = center_on_block(color,color_lower,color_upper,angle)
+		if hc > 0:
+			return yc,hc,angle
+		# Nothing in view: jump most of a field of view and look again
+		angle=angle+SEARCH_STEP
+		if angle>180:
 			angle=0
-		
-	return yc,hc,angle
-			
+
+def detect_all(blur_image, colors):
+	# Every color on one captured frame, sharing one classification: [(name, box), ...]
+	with timings.stage("classify"):
+		if DETECT_MODE == "pyramid":
+			codes = color_lut.classify(downscale(blur_image, PYRAMID_SCALE))
+		elif DETECT_MODE == "lores":
+			codes = yuv_classifier.classify(blur_image)
+		else:
+			codes = color_lut.classify(blur_image)
+	detections = []
+	for name,lower,upper,tag in colors:
+		if DETECT_MODE == "pyramid":
+			with timings.stage("pyramid"):
+				box = detect_color(blur_image, lower, upper, PYRAMID_SCALE,
+					lut=color_lut, label=name, small_codes=codes)
+		elif DETECT_MODE == "lores":
+			with timings.stage("contours"):
+				found_boxes = yuv_classifier.boxes(codes, name, MAIN_SIZE, flip_code=-1)
+			box = found_boxes[0] if found_boxes else None
+		else:
+			# Mask and dilate reuse the pipeline's buffers
+			box = pipeline.detect_mask(color_lut.mask(codes, name, dst=pipeline.mask))
+		if box is not None and box[2] > 0:
+			detections.append((name, box))
+	return detections
+
+def scan_all_colors(colors):
+	# Pan the head once and run every color on each captured frame, then
+	# center each color that was seen starting from the angle it was seen at.
+	# Colors the scene map still places skip the sweep, and the sweep visits
+	# angles the map has no fresh view of first.
+	# Returns {tag: (yc, hc, angle)}.
+	seen = {}
+	tags = {name: tag for name,lower,upper,tag in colors}
+	middle = (CENTER_BAND[0] + CENTER_BAND[1]) / 2
+	for name,lower,upper,tag in colors:
+		hit = scene.locate(name, center_x=middle)
+		if hit is not None:
+			seen[tag] = estimate_angle(*hit)
+	order = scene.stale_first(SWEEP_ANGLES)
+	step = 0
+	while len(seen) < len(colors):
+		angle = order[step % len(order)]
+		step = step+1
+		set_servo("H",angle)
+		blur_image = capture_frame()
+		searched = [c for c in colors if c[3] not in seen]
+		detections = detect_all(blur_image, searched)
+		for name,box in detections:
+			# Start centering from where the block should be, not where we looked
+			print(name+" block seen at "+str(angle))
+			seen[tags[name]] = estimate_angle(angle, box)
+		scene.update(angle, detections, scene_view(blur_image), labels=[c[0] for c in searched])
+		record_frame(blur_image, angle, detections)
+
+	found = {}
+	for name,lower,upper,tag in colors:
+		yc,hc,angle,frames,elapsed = center_on_block(name,lower,upper,seen[tag])
+		if hc == 0:
+			# Lost it while centering; fall back to a search for this color alone
+			yc,hc,angle = cntr_colorH(name,lower,upper)
+		found[tag] = (yc,hc,angle)
+	return found
+
+def rescan_all_colors(colors):
+	# scan_all_colors that starts from the scene map: the angle where each color was
+	# last centered is checked with one frame, and only if that view changed are the
+	# colors looked for again. Colors the map cannot place centered go to a scan.
+	# Relies on capture_frame() only returning frames taken after set_servo().
+	# Returns {tag: (yc, hc, angle)}.
+	names = [c[0] for c in colors]
+	middle = (CENTER_BAND[0] + CENTER_BAND[1]) / 2
+	checked = set()
+	frames = 0
+	for name in names:
+		hit = scene.locate(name, center_x=middle)
+		if hit is None or hit[0] in checked:
+			continue
+		angle = hit[0]
+		checked.add(angle)
+		set_servo("H",angle)
+		blur_image = capture_frame()
+		frames = frames+1
+		if not scene.unchanged(angle, scene_view(blur_image)):
+			# The ack comes before the head has settled, and a frame taken while it
+			# is still moving looks changed too: look once more before re-detecting
+			blur_image = capture_frame()
+			frames = frames+1
+		if scene.unchanged(angle, scene_view(blur_image)):
+			scene.touch(angle)
+		else:
+			with timings.stage("rescan_detect"):
+				detections = detect_all(blur_image, colors)
+			scene.update(angle, detections, scene_view(blur_image), labels=names)
+			record_frame(blur_image, angle, detections)
+
+	found = {}
+	for name,lower,upper,tag in colors:
+		hit = scene.locate(name, center_x=middle)
+		if hit is None:
+			continue
+		angle,(xc,yc,wc,hc) = hit
+		if CENTER_BAND[0] < xc + wc/2 < CENTER_BAND[1]:
+			found[tag] = (yc,hc,angle)
+	print(f"Scene map: {len(found)} of {len(colors)} colors from {frames} frames")
+	timings.count("scene_hits", len(found))
+	missing = [c for c in colors if c[3] not in found]
+	if missing:
+		found.update(scan_all_colors(missing))
+	return found
+
 def set_servo(direction,angle):
-	send_message(direction+str(angle))
+	global servo_moved_at
+	with timings.stage("servo_wait"):
+		if USE_FRAMES:
+			# Frames are not acknowledged; the future resolves once the 7 bytes are written
+			channel.send_raw(servo_frame(PAN_SERVO, angle)).result()
+		else:
+			# Wait for the head to acknowledge before the next capture
+			wait_reply(send_message(direction+str(angle)))
+	# Frames that started exposing before this moment may still show the old angle
+	servo_moved_at = time.monotonic()
 
         
 def send_message(message):
-	ser.write(message.encode('utf-8'))
-	print(f"Sent: {message}")
+	return channel.send(message)
+
+def wait_reply(future):
+	# Block until the micro:bit has answered; a missing or err reply is only reported
+	try:
+		return future.result()
+	except (CommandError, TimeoutError) as e:
+		print(f"No ack: {e}")
+		return None
 	
 def receive_message():
-    if ser.in_waiting >0:
-        response =ser.readline().decode('utf-8').strip()
-        return response
-    return None
+    return channel.receive_message()
     
 def get_distance(yc,hc):
-	dist = (yc+hc)/700
-	dist = 80-(74*dist)
+	# Ground-plane lookup on the block's bottom row (ranging.py, "blockdetect" calibration)
+	dist = float(ranger.distance(yc+hc))
 	print("The object is "+str(dist)+" inches away")
 	if dist <= 48:
 		dtype = "A"
@@ -119,31 +423,79 @@ def get_distance(yc,hc):
 
 ####################################################################Searching for blocks###################################################################
 
-en=1
-while True:
-	if en==1:
-		send_message("start")
-		print("Scanning procedure begun for Green")
-		yc,hc,angle=cntr_colorH("Green", green_lower, green_upper)
-		dtype = get_distance(yc,hc)
-		send_message("IG"+dtype+str(angle))
-		time.sleep(3)
+if __name__ == "__main__":
+	from picamera2 import Picamera2
+	from gpiozero import Motor,Robot,LED 
+	import RPi.GPIO as GPIO
+	from serial_channel import CommandChannel
+	from frame_grabber import FrameGrabber
+
+	channel = CommandChannel('/dev/ttyACM0', 115200, reply_timeout=REPLY_TIMEOUT, verbose=True, timer=timings)
+
+	# Initialize PiCamera
+	picam2 = Picamera2()
+	if DETECT_MODE == "lores":
+		# Detection reads only the small YUV stream; main is captured on demand
+		picam2.configure(lores_config(picam2, MAIN_SIZE, LORES_SIZE))
+	else:
+		picam2.preview_configuration.main.size = MAIN_SIZE
+		picam2.preview_configuration.main.format = "RGB888"
+		picam2.preview_configuration.align()
+		picam2.configure("preview")
+	picam2.start()
+
+	# Capture runs on its own thread; the scan always works on the newest frame
+	stream = "lores" if DETECT_MODE == "lores" else "main"
+	grabber = FrameGrabber(lambda: picam2.capture_array(stream), slots=3).start()
+
+	if DATASET_DIR:
+		dataset = FrameDatasetWriter(DATASET_DIR, [c[0] for c in scan_colors],
+			pixel_format="YUV420" if DETECT_MODE == "lores" else "BGR")
+	if SCENE_FILE:
+		scene = SceneMap.load(SCENE_FILE, max_age=SCENE_MAX_AGE)
+
+	GPIO.setmode(GPIO.BCM)
+	GPIO.setup(17,GPIO.IN)
+	GPIO.setup(27,GPIO.IN)
+
+	en=1
+	last_scan = time.time()
+	while True:
+		if RESCAN_EVERY and time.time()-last_scan >= RESCAN_EVERY:
+			en=1
+		if en==1 and SCAN_MODE == "sweep":
+			wait_reply(send_message("start"))
+			print("Scanning procedure begun for "+", ".join(c[0] for c in scan_colors))
+			found = rescan_all_colors(scan_colors)
+			for name,lower,upper,tag in scan_colors:
+				yc,hc,angle = found[tag]
+				dtype = get_distance(yc,hc)
+				wait_reply(send_message("I"+tag+dtype+str(angle)))
+		elif en==1:
+			wait_reply(send_message("start"))
+			print("Scanning procedure begun for Green")
+			yc,hc,angle=cntr_colorH("Green", green_lower, green_upper)
+			dtype = get_distance(yc,hc)
+			wait_reply(send_message("IG"+dtype+str(angle)))
 		
-		print("Scanning procedure begun for Red")
-		yc,hc,angle=cntr_colorH("Red", red_lower, red_upper)
-		dtype = get_distance(yc,hc)
-		send_message("IR"+dtype+str(angle))
-		time.sleep(3)
+			print("Scanning procedure begun for Red")
+			yc,hc,angle=cntr_colorH("Red", red_lower, red_upper)
+			dtype = get_distance(yc,hc)
+			wait_reply(send_message("IR"+dtype+str(angle)))
 		
-		print("Scanning procedure begun for Blue")
-		yc,hc,angle=cntr_colorH("Blue", blue_lower, blue_upper)
-		dtype = get_distance(yc,hc)
-		send_message("IB"+dtype+str(angle))
+			print("Scanning procedure begun for Blue")
+			yc,hc,angle=cntr_colorH("Blue", blue_lower, blue_upper)
+			dtype = get_distance(yc,hc)
+			wait_reply(send_message("IB"+dtype+str(angle)))
 		
-	en=0
-	im = picam2.capture_array()
-	im = cv2.flip(im,0)
-	im = cv2.flip(im,1)
-	blur_image = cv2.GaussianBlur(im,(7,7),0)
-	cv2.imshow("Block picker in Real-Time",blur_image)
+		if en==1:
+			# Where the scan cycle's time went
+			print(timings.report())
+			timings.export()
+			if SCENE_FILE:
+				scene.save(SCENE_FILE)
+			last_scan = time.time()
+		en=0
+		blur_image = capture_main()
+		cv2.imshow("Block picker in Real-Time",blur_image)
 	
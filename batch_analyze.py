@@ -0,0 +1,289 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from frame_source import IMAGE_EXTENSIONS
+
+# Run one of the still-image analyses over many images at once.
+#
+#   python batch_analyze.py raster runs/session3/               # one process per CPU
+#   python batch_analyze.py edge_gap "runs/*/img_*.jpg" --edge bottom --json gaps.json
+#   python batch_analyze.py raster runs/session3/ --out review/ --jobs 2   # also plots per image
+#
+# Analyses (each is the numbers part of an existing script, taking the image
+# path instead of the hard-coded IMAGE_PATH / fresh capture):
+#   raster   - raster_block_confirmation.py / senseDistanceNew.py: peaks of one
+#              raster row and the dominant color, plus the vote over CONFIRM_ROWS;
+#              with --out, the raster_record.py record and its plots
+#   rows     - raster_engine.py: every step-th row and the confirm_block() vote
+#   edge_gap - senseDistance.py compute_edge_gap: gap to the edge in pixels (and
+#              cm for the bottom edge); with --out, the annotated image
+#
+# Images are spread over a process pool. Every result is cached in CACHE_DIR
+# under a hash of the image bytes, the analysis, its parameters and
+# CACHE_VERSION, so a rerun over the same session only computes images that are
+# new or changed (or whose --out files went missing). Bump CACHE_VERSION when an
+# analysis changes what it returns.
+#
+# Images are named by their path below the deepest folder holding all of them
+# (runs/a/img_001.jpg and runs/b/img_001.jpg are a/img_001 and b/img_001), on
+# the console and under --out, so same-named images from different sessions
+# never share an output file.
+
+CACHE_DIR = ".batch_cache"
+CACHE_VERSION = 1
+
+
+# ---------------- Analyses ----------------
+# Each takes (path, params, out_base) in a worker process and returns a JSON-able
+# dict; out_base is the per-image output path without extension (None without
+# --out) and "files" lists anything written under it.
+def raster(path, params, out_base):
+    from raster_block_confirmation import analyze_line, load_rgb
+    from raster_engine import analyze_rows, confirm_block
+    rgb = load_rgb(path)
+    raw, lp, hp, summary = analyze_line(rgb, params["row"], params["kernel"])
+    voted = analyze_rows(rgb, range(*params["confirm_rows"]), params["kernel"])
+    color, share, x = confirm_block(voted)
+    summary["image"] = path
+    summary["confirm"] = {"rows": len(voted["rows"]), "color": color, "share": float(share), "x": x}
+    files = []
+    if out_base:
+        from raster_record import render_plots, save_record
+        image_dir = out_base
+        os.makedirs(image_dir, exist_ok=True)
+        record = save_record(os.path.join(image_dir, "raster_record"), raw, lp, hp, summary)
+        render_plots(record, image_dir)
+        files = [record, record[:-5] + ".npz", os.path.join(image_dir, "summary_all_channels.png")]
+    return dict(summary, files=files)
+
+
+def rows(path, params, out_base):
+    import numpy as np
+    from PIL import Image
+    from raster_engine import CHANNELS, analyze_rows, confirm_block
+    rgb = np.array(Image.open(path).convert("RGB"), dtype=np.uint8)
+    result = analyze_rows(rgb, np.arange(0, rgb.shape[0], params["step"]), params["kernel"])
+    color, share, x = confirm_block(result)
+    counts = np.bincount(result["dominant"], minlength=len(CHANNELS))
+    return {"image": path, "size": [rgb.shape[1], rgb.shape[0]], "rows": len(result["rows"]),
+            "color": color, "share": float(share), "x": x,
+            "dominant_rows": {name: int(n) for name, n in zip(CHANNELS, counts)}, "files": []}
+
+
+def edge_gap(path, params, out_base):
+    import cv2
+    from ranging import get_ranging
+    from senseDistance import annotate_edge_gap, measure_edge_gap
+    img_bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img_bgr is None:
+        raise ValueError(f"unreadable image {path}")
+    h, w = img_bgr.shape[:2]
+    gap, target_cnt = measure_edge_gap(img_bgr, params["edge"], params["min_area"], params["band"])
+    result = {"image": path, "size": [w, h], "edge": params["edge"], "gap_px": gap,
+              "found": target_cnt is not None, "files": []}
+    if target_cnt is not None:
+        result["box"] = [int(v) for v in cv2.boundingRect(target_cnt)]
+        if params["edge"] == "bottom":
+            result["gap_cm"] = float(get_ranging("sense_distance", (w, h)).distance(h - gap))
+    if out_base and target_cnt is not None:
+        os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+        annotated_path = f"{out_base}_annotated_{params['edge']}.jpg"
+        cv2.imwrite(annotated_path, annotate_edge_gap(img_bgr, target_cnt, gap, params["edge"]))
+        result["files"] = [annotated_path]
+    return result
+
+
+ANALYSES = {
+    "raster": raster,
+    "rows": rows,
+    "edge_gap": edge_gap,
+}
+
+
+def line(name, result):
+    """One console line for a result."""
+    if "error" in result:
+        return f"ERROR {result['error']}"
+    if name == "raster":
+        d, c = result["dominant"], result["confirm"]
+        return (f"row {result['row']}: {d['color']} {d['value']} at x={d['x']} | "
+                f"{c['color']} in {100 * c['share']:.0f}% of {c['rows']} rows")
+    if name == "rows":
+        return f"{result['color']} in {100 * result['share']:.0f}% of {result['rows']} rows (x={result['x']})"
+    if not result["found"]:
+        return "no object"
+    cm = f" ({result['gap_cm']:.2f} cm)" if "gap_cm" in result else ""
+    return f"gap {result['gap_px']} px{cm}"
+
+
+# ---------------- Inputs and cache ----------------
+def image_names(paths):
+    """{path: name} with each path relative to the deepest folder holding all of them.
+
+    Names keep their folders and drop the extension, unless that would make
+    two names equal (img.jpg next to img.png).
+    """
+    if not paths:
+        return {}
+    full = {path: os.path.abspath(path) for path in paths}
+    root = os.path.commonpath([os.path.dirname(p) for p in full.values()])
+    relative = {path: os.path.relpath(p, root) for path, p in full.items()}
+    stems = [os.path.splitext(r)[0] for r in relative.values()]
+    return {path: r if stems.count(os.path.splitext(r)[0]) > 1 else os.path.splitext(r)[0]
+            for path, r in relative.items()}
+
+
+def find_images(specs):
+    """Sorted image paths from directories, globs and plain files."""
+    paths = set()
+    for spec in specs:
+        if os.path.isdir(spec):
+            found = [os.path.join(spec, name) for name in os.listdir(spec)]
+        else:
+            found = glob.glob(spec)
+        paths.update(p for p in found if p.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(p))
+    return sorted(paths)
+
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(content_hash, name, params, out_base):
+    key = json.dumps([CACHE_VERSION, name, params, content_hash, os.path.abspath(out_base) if out_base else None],
+                     sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def cache_get(cache_dir, key):
+    """Cached result, or None if missing, unreadable or its output files are gone."""
+    try:
+        with open(os.path.join(cache_dir, key[:2], key + ".json")) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not all(os.path.exists(p) for p in result.get("files", [])):
+        return None
+    return result
+
+
+def cache_put(cache_dir, key, result):
+    """Write one result (atomically, so an interrupted run never leaves half a file)."""
+    folder = os.path.join(cache_dir, key[:2])
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, key + ".json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+
+
+# ---------------- Pool ----------------
+def _init_worker():
+    # One OpenCV thread per process; the pool already uses every core
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def _run(name, path, params, out_base):
+    start = time.perf_counter()
+    try:
+        result = ANALYSES[name](path, params, out_base)
+    except Exception as e:
+        return {"image": path, "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(name, paths, params, out_dir=None, jobs=None, cache_dir=CACHE_DIR, progress=print):
+    """{path: result} for every image; cached results are reused, the rest run on a pool of jobs processes."""
+    results = {}
+    todo = {}
+    names = image_names(paths)
+    out_bases = {path: os.path.join(out_dir, names[path]) if out_dir else None for path in paths}
+    for path in paths:
+        key = cache_key(file_hash(path), name, params, out_bases[path])
+        cached = cache_get(cache_dir, key) if cache_dir else None
+        if cached is not None:
+            cached["image"] = path
+            results[path] = cached
+        else:
+            todo[path] = key
+    if progress:
+        progress(f"{len(paths)} images: {len(results)} cached, {len(todo)} to analyze")
+
+    if todo:
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo)), initializer=_init_worker) as pool:
+            futures = {pool.submit(_run, name, path, params, out_bases[path]): path for path in todo}
+            for future in as_completed(futures):
+                path = futures[future]
+                result = future.result()
+                results[path] = result
+                if cache_dir and "error" not in result:
+                    cache_put(cache_dir, todo[path], result)
+    return {path: results[path] for path in paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an image analysis over many images in parallel")
+    parser.add_argument("analysis", choices=sorted(ANALYSES))
+    parser.add_argument("images", nargs="+", help="directories, globs or image files")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", help="also write per-image outputs (plots, annotated images) here")
+    parser.add_argument("--json", help="write every result to this file")
+    parser.add_argument("--cache", default=CACHE_DIR, help="result cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the cache")
+    # raster / rows
+    parser.add_argument("--row", type=int, default=200, help="raster row (raster)")
+    parser.add_argument("--confirm-rows", default="100:301:10", help="start:stop:step rows voted on (raster)")
+    parser.add_argument("--step", type=int, default=10, help="analyze every step-th row (rows)")
+    parser.add_argument("--kernel", type=int, default=15, help="low-pass kernel size (raster, rows)")
+    # edge_gap
+    parser.add_argument("--edge", default="bottom", choices=("bottom", "top", "left", "right"))
+    parser.add_argument("--min-area", type=int, default=1500)
+    parser.add_argument("--band", type=float, default=None, help="only search this fraction next to the edge")
+    args = parser.parse_args()
+
+    if args.analysis == "raster":
+        params = {"row": args.row, "kernel": args.kernel,
+                  "confirm_rows": [int(v) for v in args.confirm_rows.split(":")]}
+    elif args.analysis == "rows":
+        params = {"step": args.step, "kernel": args.kernel}
+    else:
+        params = {"edge": args.edge, "min_area": args.min_area, "band": args.band}
+
+    paths = find_images(args.images)
+    if not paths:
+        raise SystemExit(f"no images in {', '.join(args.images)}")
+
+    start = time.perf_counter()
+    results = run_batch(args.analysis, paths, params, args.out, args.jobs,
+                        None if args.no_cache else args.cache)
+    elapsed = time.perf_counter() - start
+
+    names = image_names(paths)
+    width = max(len(name) for name in names.values())
+    for path, result in results.items():
+        print(f"{names[path]:<{width}}  {line(args.analysis, result)}")
+    errors = sum("error" in r for r in results.values())
+    print(f"{len(results)} images in {elapsed:.2f} s" + (f", {errors} failed" if errors else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"analysis": args.analysis, "params": params, "results": list(results.values())}, f, indent=1)
+    if errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+import BlockDetect
+import camera_program
+import senseDistance
+from frame_source import open_source
+from roi_tracker import RoiTracker
+from pyramid_detect import compute_edge_gap_pyramid, detect_color, downscale, downscale_hsv
+from frame_pipeline import FramePipeline
+
+# Benchmark the detection pipelines on recorded frames, off the robot.
+#
+#   python bench_detection.py recordings/ --frames 200
+#   python bench_detection.py run.mp4 --pipelines blockdetect_sweep_frame --json today.json
+#   python bench_detection.py recordings/ --compare today.json   # exit 1 on a regression
+#
+# Frames are decoded into memory before timing, so only the pipeline is measured.
+# Each call gets its own copy of the frame (made outside the timed region)
+# because several pipelines draw on the frame they are given.
+
+
+# ---------------- Pipelines ----------------
+def blockdetect_prepare(frame):
+    return BlockDetect.prepare_frame(frame)
+
+
+def blockdetect_single_color(frame):
+    return BlockDetect.detect_single_color(frame, "Green", BlockDetect.green_lower,
+                                           BlockDetect.green_upper, (0, 255, 0))[1:]
+
+
+def blockdetect_sweep_frame(frame):
+    # One frame of the single-sweep scan at full resolution: blur, one HSV conversion, every color
+    blur_image = cv2.GaussianBlur(cv2.flip(frame, -1), (7, 7), 0)
+    hsv_image = cv2.cvtColor(blur_image, cv2.COLOR_BGR2HSV)
+    return [BlockDetect.detect_in_hsv(blur_image, hsv_image, name, lower, upper, (0, 255, 0))[1:]
+            for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+# Buffers persist across calls, like the live loop
+_sweep_pipeline = FramePipeline()
+
+
+def frame_pipeline_sweep(frame):
+    # Same frame through the preallocated pipeline
+    _sweep_pipeline.prepare(frame)
+    return [_sweep_pipeline.detect(lower, upper) for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+def pyramid_sweep_frame(frame):
+    # Same frame with the coarse-to-fine detector
+    frame = cv2.flip(frame, -1)
+    small_hsv = downscale_hsv(frame, BlockDetect.PYRAMID_SCALE)
+    return [detect_color(frame, lower, upper, BlockDetect.PYRAMID_SCALE, small_hsv=small_hsv)
+            for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+def lut_sweep_frame(frame):
+    # Full-resolution sweep frame with every color from one lookup-table pass (BlockDetect "full")
+    blur_image = _sweep_pipeline.prepare(frame)
+    codes = BlockDetect.color_lut.classify(blur_image)
+    return [_sweep_pipeline.detect_mask(BlockDetect.color_lut.mask(codes, name, dst=_sweep_pipeline.mask))
+            for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+def pyramid_lut_sweep_frame(frame):
+    # Coarse-to-fine with the lookup table (BlockDetect "pyramid")
+    frame = cv2.flip(frame, -1)
+    lut = BlockDetect.color_lut
+    codes = lut.classify(downscale(frame, BlockDetect.PYRAMID_SCALE))
+    return [detect_color(frame, lower, upper, BlockDetect.PYRAMID_SCALE, lut=lut, label=name, small_codes=codes)
+            for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+def yuv_lores_sweep(frame):
+    # Same frame classified on a 640x360 YUV420 copy; making that copy is the
+    # ISP's job on the robot, so this includes work the Pi does not do
+    lores = cv2.cvtColor(cv2.resize(frame, BlockDetect.LORES_SIZE, interpolation=cv2.INTER_AREA),
+                         cv2.COLOR_BGR2YUV_I420)
+    codes = BlockDetect.yuv_classifier.classify(lores)
+    return [BlockDetect.yuv_classifier.boxes(codes, name, BlockDetect.MAIN_SIZE, flip_code=-1)
+            for name, lower, upper, tag in BlockDetect.scan_colors]
+
+
+def camera_program_red(frame):
+    return camera_program.find_target(frame, "red", cv2.COLOR_BGR2HSV)
+
+
+def camera_program_all_colors(frame):
+    # Every color from one HSV conversion, as the multi-color drive loop does
+    return camera_program.find_targets(frame, conversion=cv2.COLOR_BGR2HSV)
+
+
+# Tracking keeps state across calls, like the live loop
+_red_tracker = RoiTracker(camera_program_red)
+
+
+def camera_program_red_tracked(frame):
+    return _red_tracker.update(frame)
+
+
+def edge_gap_bottom(frame):
+    return senseDistance.compute_edge_gap(frame, edge="bottom", min_area=1500)[0]
+
+
+def edge_gap_bottom_band(frame):
+    # The approach loop's call: bottom half only, no annotation
+    return senseDistance.measure_edge_gap(frame, edge="bottom", min_area=1500, band=0.5)[0]
+
+
+def edge_gap_bottom_pyramid(frame):
+    return compute_edge_gap_pyramid(frame, edge="bottom", min_area=1500)[0]
+
+
+PIPELINES = {
+    "blockdetect_prepare": blockdetect_prepare,
+    "detect_single_color": blockdetect_single_color,
+    "blockdetect_sweep_frame": blockdetect_sweep_frame,
+    "frame_pipeline_sweep": frame_pipeline_sweep,
+    "pyramid_sweep_frame": pyramid_sweep_frame,
+    "lut_sweep_frame": lut_sweep_frame,
+    "pyramid_lut_sweep_frame": pyramid_lut_sweep_frame,
+    "yuv_lores_sweep": yuv_lores_sweep,
+    "camera_program_red": camera_program_red,
+    "camera_program_red_tracked": camera_program_red_tracked,
+    "camera_program_all_colors": camera_program_all_colors,
+    "compute_edge_gap": edge_gap_bottom,
+    "compute_edge_gap_band": edge_gap_bottom_band,
+    "compute_edge_gap_pyramid": edge_gap_bottom_pyramid,
+}
+
+
+# ---------------- Timing ----------------
+def load_frames(spec, limit):
+    frames = []
+    with open_source(spec) as source:
+        for frame in source:
+            frames.append(frame)
+            if len(frames) >= limit:
+                break
+    if not frames:
+        raise SystemExit(f"no frames in {spec}")
+    return frames
+
+
+def run_pipeline(fn, frames, calls, warmup):
+    for i in range(warmup):
+        fn(frames[i % len(frames)].copy())
+    latencies = np.empty(calls)
+    total = 0.0
+    for i in range(calls):
+        frame = frames[i % len(frames)].copy()
+        start = time.perf_counter()
+        fn(frame)
+        latencies[i] = time.perf_counter() - start
+        total += latencies[i]
+    return {
+        "calls": calls,
+        "fps": calls / total if total > 0 else float("inf"),
+        "mean_ms": 1000 * latencies.mean(),
+        "p50_ms": 1000 * np.percentile(latencies, 50),
+        "p99_ms": 1000 * np.percentile(latencies, 99),
+        "max_ms": 1000 * latencies.max(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Names of pipelines whose p50 got slower than baseline by more than tolerance."""
+    slower = []
+    for name, stats in results.items():
+        if name in baseline and stats["p50_ms"] > baseline[name]["p50_ms"] * (1 + tolerance):
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection pipelines on recorded frames")
+    parser.add_argument("source", help="directory, glob or video file of recorded frames")
+    parser.add_argument("--frames", type=int, default=100, help="frames to load from the source")
+    parser.add_argument("--calls", type=int, default=None, help="timed calls per pipeline (default: one per frame)")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="comma separated names")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.pipelines.split(",") if n.strip()]
+    unknown = [n for n in names if n not in PIPELINES]
+    if unknown:
+        raise SystemExit(f"unknown pipelines: {', '.join(unknown)} (have {', '.join(PIPELINES)})")
+
+    frames = load_frames(args.source, args.frames)
+    h, w = frames[0].shape[:2]
+    calls = args.calls or len(frames)
+    print(f"{len(frames)} frames ({w}x{h}) from {args.source}, {calls} calls per pipeline")
+    print(f"{'pipeline':<30}{'fps':>9}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+    results = {}
+    for name in names:
+        stats = run_pipeline(PIPELINES[name], frames, calls, args.warmup)
+        results[name] = stats
+        print(f"{name:<30}{stats['fps']:>9.1f}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"source": args.source, "frame_size": [w, h], "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        slower = compare(results, baseline, args.tolerance)
+        for name in slower:
+            print(f"REGRESSION {name}: p50 {results[name]['p50_ms']:.2f} ms vs {baseline[name]['p50_ms']:.2f} ms")
+        if slower:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,44 @@
 import cv2
 import numpy as np
 import time
-from gpiozero import LED
-from picamera2 import Picamera2
+
+from ranging import get_ranging
+from drive_control import RateLoop, steer
+from stage_timing import StageTimes
+from color_lut import ColorLUT
+
+# Camera and GPIO are only opened when run as a script, so find_target() can be
+# imported and benchmarked off the robot.
 
 # -----------------------------
 # Raspberry Pi GPIO setup
 # -----------------------------
-led1 = LED(17)   # Right Motor Forward
-led2 = LED(27)   # Right Motor Reverse
-led3 = LED(23)   # Left Motor Forward
-led4 = LED(24)   # Left Motor Reverse
+def setup_motors():
+    global robot
+    from gpiozero import Motor, Robot
+    # Same H-bridge pins the on/off LED outputs used, now PWM speed controlled.
+    # The old LED names called 17/27 the right motor, but turn_right() drove
+    # 17 forward and 24 reverse, and that is the way the robot turned toward a
+    # target on its right, so 17/27 is the left wheel as far as steering goes:
+    #   robot.right() / positive bearing in steer() -> 17 forward, 24 reverse
+    #   robot.left()  / negative bearing            -> 23 forward, 27 reverse
+    robot = Robot(left=Motor(17, 27),    # Forward, Reverse
+                  right=Motor(23, 24))   # Forward, Reverse
 
 def stop():
-    led1.off(); led2.off(); led3.off(); led4.off()
+    robot.stop()
 
-def move_forward():
-    led1.on(); led2.off(); led3.on(); led4.off()
+def move_forward(speed=1):
+    robot.forward(speed)
 
-def move_backward():
-    led1.off(); led2.on(); led3.off(); led4.on()
+def move_backward(speed=1):
+    robot.backward(speed)
 
-def turn_left():
-    led1.off(); led2.on(); led3.on(); led4.off()
+def turn_left(speed=1):
+    robot.left(speed)
 
-def turn_right():
-    led1.on(); led2.off(); led3.off(); led4.on()
-
-# -----------------------------
-# Camera setup
-# -----------------------------
-picam2 = Picamera2()
-camera_config = picam2.create_still_configuration(main={"size": (640, 480)})  # smaller = faster
-picam2.configure(camera_config)
-picam2.start()
-time.sleep(2)
+def turn_right(speed=1):
+    robot.right(speed)
 
 # -----------------------------
 # Color ranges (HSV)
@@ -51,93 +55,210 @@ color_ranges = {
 # Camera / movement parameters
 # -----------------------------
 FOV_HORIZONTAL = 62.2  # Raspberry Pi Camera v2 horizontal FOV (deg)
+MAIN_SIZE = (640, 480)
+USE_LORES = False      # opt-in: detect on a small YUV side stream instead of the RGB main stream
+LORES_SIZE = (320, 240)
 
-# Calibration table (pixel height -> distance cm)
-calibration = {
-    50: 14,
-    100: 21,
-    150: 29,
-    200: 47
-}
+# Block height -> distance (cm) and column -> bearing tables (ranging.py, "camera_program" calibration)
+ranger = get_ranging("camera_program", MAIN_SIZE, FOV_HORIZONTAL)
+
+TARGET_COLORS = ["red", "green", "blue", "yellow"]
+
+# Pixel -> color bits for every target color, one table per pixel order (cached on disk)
+LUT_FORMATS = {cv2.COLOR_RGB2HSV: "RGB", cv2.COLOR_BGR2HSV: "BGR"}
+color_luts = {}
+
+def target_lut(conversion=cv2.COLOR_RGB2HSV):
+    """ColorLUT of every TARGET_COLORS profile for frames that conversion would turn into HSV."""
+    pixel_format = LUT_FORMATS[conversion]
+    if pixel_format not in color_luts:
+        color_luts[pixel_format] = ColorLUT({c: target_boxes(c) for c in TARGET_COLORS}, pixel_format)
+    return color_luts[pixel_format]
+
+def largest_box(mask):
+    """Bounding box of the largest contour in a mask, or None."""
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    c = max(contours, key=cv2.contourArea)
+    return cv2.boundingRect(c)
+
+def find_target(frame, target_color, conversion=cv2.COLOR_RGB2HSV):
+    """Bounding box (x, y, w, h) of the largest blob of target_color, or None.
+
+    Picamera2 frames are RGB; pass conversion=cv2.COLOR_BGR2HSV for frames
+    read with OpenCV.
+    """
+    lut = target_lut(conversion)
+    return largest_box(lut.mask(lut.classify(frame), target_color))
+
+def find_targets(frame, colors=TARGET_COLORS, conversion=cv2.COLOR_RGB2HSV):
+    """{color: box or None} for every color, from one lookup-table pass over the frame."""
+    lut = target_lut(conversion)
+    with timings.stage("classify"):
+        codes = lut.classify(frame)
+    found = {}
+    for color in colors:
+        with timings.stage("mask"):
+            mask = lut.mask(codes, color)
+        with timings.stage("contours"):
+            found[color] = largest_box(mask)
+    return found
+
+def target_boxes(target_color):
+    """HSV boxes for a color name; red is two boxes because its hue wraps."""
+    if target_color == "red":
+        return [color_ranges["red1"], color_ranges["red2"]]
+    return [color_ranges[target_color]]
+
+def lores_classifier():
+    """YuvClassifier for every color, for frames from the YUV420 lores stream."""
+    from yuv_detect import YuvClassifier
+    # find_target keeps the largest blob whatever its size
+    return YuvClassifier({name: target_boxes(name) for name in TARGET_COLORS}, min_area=0)
+
+def find_targets_lores(classifier, buf, colors=TARGET_COLORS):
+    """find_targets for a lores YUV420 buffer: one classification shared by every color."""
+    with timings.stage("classify"):
+        codes = classifier.classify(buf)
+    found = {}
+    for color in colors:
+        with timings.stage("contours"):
+            boxes = classifier.boxes(codes, color, MAIN_SIZE)
+        found[color] = boxes[0] if boxes else None
+    return found
 
-def interpolate_distance(pixel_height):
-    """Estimate distance from pixel height using linear interpolation."""
-    pixels = sorted(calibration.keys())
+# -----------------------------
+# Per-color tracks
+# -----------------------------
+class ColorTrack:
+    """Where one color's block was last seen; kept up to date while another color is the target."""
 
-    if pixel_height <= pixels[0]:
-        return calibration[pixels[0]]
-    if pixel_height >= pixels[-1]:
-        return calibration[pixels[-1]]
+    def __init__(self, color):
+        self.color = color
+        self.box = None
+        self.distance = None
+        self.bearing = None
+        self.last_seen = None
 
-    for i in range(len(pixels) - 1):
-        p1, p2 = pixels[i], pixels[i + 1]
-        if p1 <= pixel_height <= p2:
-            d1, d2 = calibration[p1], calibration[p2]
-            return d1 + (d2 - d1) * ((pixel_height - p1) / (p2 - p1))
+    def age(self, now):
+        """Seconds since the block was last seen (inf if never)."""
+        return float("inf") if self.last_seen is None else now - self.last_seen
 
-    return None
+    def fresh(self, now, max_age):
+        return self.age(now) <= max_age
+
+def update_tracks(tracks, found, now):
+    """Fold one frame's {color: box or None} into the tracks, ranging every seen block at once."""
+    seen = [color for color, box in found.items() if box is not None and color in tracks]
+    if not seen:
+        return
+    distances, bearings = ranger.measure([found[color] for color in seen])
+    for color, distance, bearing in zip(seen, distances, bearings):
+        track = tracks[color]
+        track.box = found[color]
+        track.distance = float(distance)
+        track.bearing = float(bearing)
+        track.last_seen = now
 
 # -----------------------------
 # Choose target color
 # -----------------------------
-target_color = "red"   # change to "green", "blue", "yellow" as needed
+target_color = "red"   # first target; change to "green", "blue", "yellow" as needed
+TARGET_ORDER = ["red"] # colors to drive to in turn; the next one's track is already live
+STOP_DISTANCE = 15     # cm; close enough to the current target
+TRACK_TIMEOUT = 0.25   # s; drive on a track only while it is this fresh
+CONTROL_RATE = 15      # Hz; the loop reports jitter/overruns if capture + detection can't keep up
+STEER_GAIN = 1 / 20    # motor speed difference per degree of bearing
+CRUISE_SPEED = 0.6     # forward speed (0-1) when the target is straight ahead and far
+REPORT_EVERY = 10      # s between loop timing reports
+TIMING_FILE = "camera_program_timings.prom"   # per-stage histograms; .prom = Prometheus text, else JSON
+TIMING_EVERY = 10      # s between rewrites of TIMING_FILE
+
+timings = StageTimes(TIMING_FILE, TIMING_EVERY, prefix="camera_program")
 
 # -----------------------------
 # Main loop
 # -----------------------------
-try:
-    while True:
-        frame = picam2.capture_array()
-        hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
-
-        # Get mask for chosen color
-        mask = None
-        if target_color == "red":
-            mask1 = cv2.inRange(hsv, color_ranges["red1"][0], color_ranges["red1"][1])
-            mask2 = cv2.inRange(hsv, color_ranges["red2"][0], color_ranges["red2"][1])
-            mask = cv2.bitwise_or(mask1, mask2)
-        else:
-            lower, upper = color_ranges[target_color]
-            mask = cv2.inRange(hsv, lower, upper)
-
-        # Find contours of detected object
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        if contours:
-            # Use the largest contour
-            c = max(contours, key=cv2.contourArea)
-            x, y, w, h = cv2.boundingRect(c)
-            cx = x + w // 2
-            cy = y + h // 2
-
-            # Angle (in degrees)
-            center_x = frame.shape[1] // 2
-            angle = (cx - center_x) * (FOV_HORIZONTAL / frame.shape[1])
-
-            # Distance using calibration table
-            distance = interpolate_distance(h) if h > 0 else None
-
-            print(f"Color: {target_color}, Angle: {angle:.2f} deg, Height: {h}px, Distance: {distance:.2f} cm")
-
-            # -----------------------------
-            # Movement logic
-            # -----------------------------
-            if distance is None:
-                stop()
-            elif distance < 15:  # stop if close enough
+if __name__ == "__main__":
+    from picamera2 import Picamera2
+    from frame_grabber import FrameGrabber
+    from yuv_detect import lores_config
+
+    setup_motors()
+
+    # -----------------------------
+    # Camera setup
+    # -----------------------------
+    picam2 = Picamera2()
+    if USE_LORES:
+        # Only the small YUV stream is read; boxes come back in main-stream pixels
+        camera_config = lores_config(picam2, MAIN_SIZE, LORES_SIZE, still=True)
+    else:
+        camera_config = picam2.create_still_configuration(main={"size": MAIN_SIZE})  # smaller = faster
+    picam2.configure(camera_config)
+    picam2.start()
+    time.sleep(2)
+
+    # Capture on a background thread so processing overlaps the next capture
+    if USE_LORES:
+        classifier = lores_classifier()
+        grabber = FrameGrabber(lambda: picam2.capture_array("lores"), slots=3).start()
+    else:
+        grabber = FrameGrabber(picam2.capture_array, slots=3).start()
+
+    # Every color is classified from each frame, so switching targets needs no new search
+    tracks = {color: ColorTrack(color) for color in TARGET_COLORS}
+    order = [c for c in TARGET_ORDER if c in tracks] or [target_color]
+    target_color = order[0]
+
+    # Steering updates at a fixed rate instead of as fast as frames arrive plus a sleep
+    loop = RateLoop(CONTROL_RATE)
+
+    try:
+        while True:
+            loop.wait()
+            with timings.stage("capture"):
+                frame, seq, stamp = grabber.latest()
+            timings.count("frames")
+            if USE_LORES:
+                found = find_targets_lores(classifier, frame)
+            else:
+                found = find_targets(frame)
+            update_tracks(tracks, found, stamp)
+            track = tracks[target_color]
+
+            if track.fresh(stamp, TRACK_TIMEOUT):
+                x, y, w, h = track.box
+                angle = track.bearing
+                distance = track.distance if h > 0 else None
+
+                print(f"Color: {target_color}, Angle: {angle:.2f} deg, Height: {h}px, Distance: {distance:.2f} cm")
+
+                # -----------------------------
+                # Movement logic: proportional left/right speeds, slowing down near the block
+                # -----------------------------
+                with timings.stage("motors"):
+                    robot.value = steer(angle, distance, STOP_DISTANCE, kp=STEER_GAIN, cruise=CRUISE_SPEED)
+                if distance is not None and distance < STOP_DISTANCE:  # close enough
+                    if order.index(target_color) + 1 < len(order):
+                        # Next color: its track is already current, no search needed
+                        target_color = order[order.index(target_color) + 1]
+                        print(f"Reached block, next target: {target_color}")
+            else:
                 stop()
-            elif abs(angle) < 5:
-                move_forward()
-            elif angle < -5:
-                turn_left()
-            elif angle > 5:
-                turn_right()
-        else:
-            stop()
-
-        time.sleep(0.1)
-
-except KeyboardInterrupt:
-    stop()
-    picam2.stop()
-    print("Program stopped.")
+
+            if loop.ticks % (CONTROL_RATE * REPORT_EVERY) == 0:
+                print("Control loop:", loop.report())
+            timings.maybe_export()
+
+    except KeyboardInterrupt:
+        stop()
+        grabber.stop()
+        picam2.stop()
+        seen = ", ".join(f"{c} {t.age(time.monotonic()):.1f}s ago" for c, t in tracks.items()
+                         if t.last_seen is not None)
+        print(f"Program stopped. ({grabber.dropped} stale frames skipped; last seen: {seen or 'nothing'})")
+        print("Control loop:", loop.report())
+        print(timings.report())
+        timings.export()
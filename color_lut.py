@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+# Every color profile compiled into one lookup table: pixel -> color bits.
+#
+# A profile is a list of (lower, upper) OpenCV HSV boxes per color name, so a
+# hue that wraps (red) is just two boxes. Each color gets one bit of a uint8,
+# and classify() maps every pixel of a frame to its bits with a single table
+# lookup, whatever the number of colors; mask() then picks one color out.
+#
+#   BGR / RGB frames: the frame is packed to 16 bits per pixel with OpenCV's
+#                     BGR565 conversion (5/6/5 bits) and that code indexes a
+#                     65536-entry table.
+#   YUV420 buffers:   (Y, U, V) at chroma resolution, `bits` per channel
+#                     (see yuv_detect.py).
+# Quantizing moves the HSV edges by a few units, well inside how far the
+# hand-tuned bounds are from each other.
+#
+# Tables are cached in CACHE_DIR under a hash of the profiles, so a script
+# only builds them the first time its color bounds change.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lut_cache")
+TABLE_VERSION = 2
+PACKED_FORMATS = {"BGR": cv2.COLOR_BGR2BGR565, "RGB": cv2.COLOR_RGB2BGR565}
+BIN_CENTER = (4, 2, 4)    # half a 5/6/5-bit bin in B, G, R
+
+
+def split_i420(buf):
+    """Y, U, V planes of an I420 buffer as returned by capture_array("lores").
+
+    The buffer is (3/2 * h, w): h rows of Y, then U and V at half resolution
+    each way, two chroma rows packed into every buffer row. Returns views.
+    """
+    h = buf.shape[0] * 2 // 3
+    w = buf.shape[1]
+    y = buf[:h]
+    u = buf[h:h + h // 4].reshape(h // 2, w // 2)
+    v = buf[h + h // 4:h + h // 2].reshape(h // 2, w // 2)
+    return y, u, v
+
+
+def _hsv_bits(colors_bgr, profiles):
+    """Color bits of an (N, 1, 3) BGR array under the profiles."""
+    hsv = cv2.cvtColor(colors_bgr, cv2.COLOR_BGR2HSV)
+    table = np.zeros(len(colors_bgr), np.uint8)
+    for i, boxes in enumerate(profiles.values()):
+        hit = np.zeros(len(colors_bgr), bool)
+        for lower, upper in boxes:
+            hit |= cv2.inRange(hsv, np.asarray(lower), np.asarray(upper)).ravel() > 0
+        table[hit] |= 1 << i
+    return table
+
+
+def build_table(profiles, pixel_format, bits=6):
+    """Table for the profiles; YUV420 tables are (2^bits)^3, the others 65536 entries."""
+    if len(profiles) > 8:
+        raise ValueError("at most 8 colors fit in the lookup table")
+    if pixel_format == "YUV420":
+        # Center of every table cell as a YUV pixel
+        shift = 8 - bits
+        levels = (np.arange(1 << bits, dtype=np.uint16) << shift) + (1 << shift) // 2
+        y, u, v = np.meshgrid(levels, levels, levels, indexing="ij")
+        yuv = np.stack([y, u, v], axis=-1).astype(np.uint8).reshape(-1, 1, 3)
+        return _hsv_bits(cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR), profiles)
+    if pixel_format not in PACKED_FORMATS:
+        raise ValueError(f"unknown pixel format {pixel_format}")
+    # Every 16-bit code, decoded to the color OpenCV packs into it (the packed
+    # code is the same for RGB and BGR input, only the conversion differs).
+    # Packing drops the low bits, so the decoded value is the bottom of its
+    # bin; move it to the center like the YUV cells.
+    codes = np.arange(65536, dtype=np.uint16).view(np.uint8).reshape(-1, 1, 2)
+    bgr = cv2.cvtColor(codes, cv2.COLOR_BGR5652BGR) + np.array(BIN_CENTER, np.uint8)
+    return _hsv_bits(bgr, profiles)
+
+
+def load_table(profiles, pixel_format, bits=6, cache_dir=CACHE_DIR):
+    """build_table(), read from / written to the on-disk cache."""
+    key = json.dumps([TABLE_VERSION, pixel_format, bits,
+                      [[name, [[np.asarray(lo).tolist(), np.asarray(hi).tolist()] for lo, hi in boxes]]
+                       for name, boxes in profiles.items()]])
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, f"{pixel_format}-{hashlib.sha1(key.encode()).hexdigest()[:16]}.npy")
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            pass
+    table = build_table(profiles, pixel_format, bits)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = path + ".tmp.npy"
+            np.save(tmp, table)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[color_lut] not caching {path}: {e}")
+    return table
+
+
+class ColorLUT:
+    """Classifies every pixel into color bits with one table lookup."""
+
+    def __init__(self, profiles, pixel_format="BGR", bits=6, cache_dir=CACHE_DIR):
+        self.names = list(profiles)
+        self.bit = {name: 1 << i for i, name in enumerate(self.names)}
+        self.pixel_format = pixel_format
+        self.bits = bits
+        self.table = load_table(profiles, pixel_format, bits, cache_dir)
+
+    def classify(self, frame):
+        """uint8 color bits per pixel (per chroma sample for YUV420 buffers)."""
+        if self.pixel_format == "YUV420":
+            y, u, v = split_i420(frame)
+            b, s = self.bits, 8 - self.bits
+            index = (y[::2, ::2] >> s).astype(np.intp) << (2 * b)
+            index |= (u >> s).astype(np.intp) << b
+            index |= (v >> s).astype(np.intp)
+            return self.table[index]
+        packed = cv2.cvtColor(frame, PACKED_FORMATS[self.pixel_format])
+        return np.take(self.table, packed.view(np.uint16)[..., 0])
+
+    def mask(self, codes, name, dst=None):
+        """Mask of one color from classify() output (non-zero where it matches)."""
+        return cv2.bitwise_and(codes, self.bit[name], dst=dst)
@@ -2,19 +2,13 @@ from picamera2 import Picamera2
 from PIL import Image
 import numpy as np
 import time
+from region_ops import draw_box, paint_reference_blocks
 
 def pbox(ia,x,y,d):
     ix=int(x-(d/2))
     iy=int(y-(d/2))
-    # top and bottom line
-    for i in range(ix,x+d):
-        ia[iy,i]=[0,0,0]
-        ia[y+d,i]=[0,0,0]
-    for j in range(iy,y+d):
-        ia[j,ix]=[0,0,0]
-        ia[j,x+d]=[0,0,0]
-       
-    return ia
+    # same outline as before: rows iy and y+d, columns ix and x+d
+    return draw_box(ia,[ix,x+d],[iy,y+d])
 
 # Create a Picamera2 object
 picam2 = Picamera2()
@@ -47,14 +41,7 @@ print("Picture taken and saved as blocks.jpg")
 print(f"caputred image array shape:{image_array.shape}")
 a,b=200,200
 c,d=50,90
-for i in range (0,d):
-    # print(image_array[i,200])
-    for j in range (0,c):
-        image_array[i+a,j+b]=[0,0,0]
-        image_array[i+a,j+b+c]=[255,0,0] 
-        image_array[i+a,j+b+2*c]=[0,255,0]
-        image_array[i+a,j+b+3*c]=[0,0,255]
-        image_array[i+a,j+b+4*c]=[255,255,0]
+image_array=paint_reference_blocks(image_array,a,b,c,d)
 
 image_array=pbox(image_array,400,800,100)
 
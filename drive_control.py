@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+
+# Fixed-rate control loop and proportional differential-drive steering.
+#
+#   loop = RateLoop(15)
+#   while True:
+#       loop.wait()                      # returns on the next 1/15 s tick
+#       ...detect...
+#       robot.value = steer(bearing, distance)
+#
+# RateLoop schedules ticks on absolute deadlines, so a slow iteration does
+# not push every later tick back. It records how late each tick started
+# (jitter) and how many iterations ran past their period (overruns; the
+# missed ticks are skipped rather than run back to back).
+
+
+class RateLoop:
+    """Paces a loop at rate_hz and keeps jitter/overrun statistics."""
+
+    def __init__(self, rate_hz, history=1000, clock=time.monotonic, sleep=time.sleep):
+        self.period = 1.0 / rate_hz
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = np.zeros(history)     # seconds late, ring buffer of the latest ticks
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.next_tick = None
+
+    def wait(self):
+        """Sleep until the next tick; returns the tick's scheduled time."""
+        now = self.clock()
+        if self.next_tick is None:
+            self.next_tick = now
+        elif now > self.next_tick:
+            # The last iteration ran past its period: run now, dropping any whole ticks it missed
+            missed = int((now - self.next_tick) / self.period)
+            self.overruns += 1
+            self.skipped += missed
+            self.next_tick += missed * self.period
+        else:
+            self.sleep(self.next_tick - now)
+        scheduled = self.next_tick
+        self.jitter[self.ticks % len(self.jitter)] = max(0.0, self.clock() - scheduled)
+        self.ticks += 1
+        self.next_tick = scheduled + self.period
+        return scheduled
+
+    def stats(self):
+        """Jitter (ms, over the latest ticks) and overrun counts."""
+        recent = self.jitter[:min(self.ticks, len(self.jitter))]
+        if not len(recent):
+            recent = np.zeros(1)
+        return {
+            "rate_hz": 1.0 / self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped,
+            "jitter_mean_ms": 1000 * recent.mean(),
+            "jitter_p99_ms": 1000 * np.percentile(recent, 99),
+            "jitter_max_ms": 1000 * recent.max(),
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"{s['ticks']} ticks at {s['rate_hz']:.0f} Hz, {s['overruns']} overruns "
+                f"({s['skipped_ticks']} ticks skipped), jitter mean {s['jitter_mean_ms']:.1f} ms, "
+                f"p99 {s['jitter_p99_ms']:.1f} ms, max {s['jitter_max_ms']:.1f} ms")
+
+
+def steer(bearing, distance, stop_distance, kp=1 / 20, cruise=0.6, slow_distance=None, max_turn=0.6):
+    """(left, right) motor speeds in -1..1 for a target at bearing (deg, + right) and distance.
+
+    The turn term is proportional to the bearing (kp per degree, capped at
+    max_turn). Forward speed is cruise, reduced as the bearing grows (so big
+    corrections turn mostly in place) and ramped down to zero between
+    slow_distance (default 3 * stop_distance) and stop_distance.
+    """
+    if distance is None or distance <= stop_distance:
+        return 0.0, 0.0
+    if slow_distance is None:
+        slow_distance = 3 * stop_distance
+    turn = float(np.clip(kp * bearing, -max_turn, max_turn))
+    forward = cruise * (1 - abs(turn) / max_turn) if max_turn > 0 else cruise
+    ramp = (distance - stop_distance) / max(slow_distance - stop_distance, 1e-9)
+    forward *= min(1.0, ramp)
+    left = float(np.clip(forward + turn, -1, 1))
+    right = float(np.clip(forward - turn, -1, 1))
+    return left, right
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# Append-only dataset of raw frames that offline tools can slice without decoding.
+#
+# A dataset is a directory with three files:
+#   frames.bin - raw uint8 pixels of every frame, back to back
+#   index.bin  - one fixed-size INDEX_DTYPE record per frame: byte offset,
+#                timestamp, servo angle, resolution and up to MAX_DETECTIONS
+#                labelled boxes
+#   meta.json  - pixel format and the detection label names
+# Both .bin files are memory-mapped for reading, so frame i is a view into the
+# page cache and ds.frames()[::10] costs nothing until pixels are touched.
+# Writers only ever append, pixels before the index record, so a run that
+# is cut off leaves at most an unindexed tail that readers ignore.
+#
+#   with FrameDatasetWriter("runs/sweep1", labels=["Green", "Red", "Blue"]) as ds:
+#       ds.append(frame, angle=90, detections=[("Red", (x, y, w, h))])
+#
+#   ds = FrameDataset("runs/sweep1")
+#   frame = ds[17]; ds.index["angle"]; ds.detections(17)
+#
+#   python frame_dataset.py info runs/sweep1
+#   python frame_dataset.py import recordings/ runs/old   # convert a JPEG folder once
+
+MAX_DETECTIONS = 8
+NO_ANGLE = np.nan
+
+DETECTION_DTYPE = np.dtype([("label", "u1"), ("x", "<i2"), ("y", "<i2"), ("w", "<i2"), ("h", "<i2")])
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("timestamp", "<f8"),
+    ("angle", "<f4"),          # servo angle in degrees, NaN when unknown
+    ("height", "<u2"),
+    ("width", "<u2"),
+    ("channels", "u1"),
+    ("n_detections", "u1"),
+    ("detections", DETECTION_DTYPE, (MAX_DETECTIONS,)),
+])
+
+
+def _paths(path):
+    return (os.path.join(path, "frames.bin"), os.path.join(path, "index.bin"),
+            os.path.join(path, "meta.json"))
+
+
+class FrameDatasetWriter:
+    """Appends frames and their index records to a dataset directory (created if needed)."""
+
+    def __init__(self, path, labels=(), pixel_format="BGR"):
+        frames_path, index_path, meta_path = _paths(path)
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["pixel_format"] != pixel_format:
+                raise ValueError(f"{path} holds {meta['pixel_format']} frames, not {pixel_format}")
+            self.labels = meta["labels"] + [name for name in labels if name not in meta["labels"]]
+        else:
+            self.labels = list(labels)
+        self.pixel_format = pixel_format
+        self.meta_path = meta_path
+        self._write_meta()
+
+        # Drop a torn index record or unindexed pixels left by an interrupted run
+        records = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        end = 0
+        if records:
+            last = np.fromfile(index_path, INDEX_DTYPE, count=1, offset=(records - 1) * INDEX_DTYPE.itemsize)[0]
+            end = int(last["offset"]) + int(last["height"]) * int(last["width"]) * int(last["channels"])
+        self._frames = open(frames_path, "ab")
+        self._index = open(index_path, "ab")
+        self._frames.truncate(end)
+        self._index.truncate(records * INDEX_DTYPE.itemsize)
+        self._frames.seek(end)
+        self._index.seek(records * INDEX_DTYPE.itemsize)
+        self.count = records
+
+    def _write_meta(self):
+        with open(self.meta_path, "w") as f:
+            json.dump({"pixel_format": self.pixel_format, "labels": self.labels,
+                       "max_detections": MAX_DETECTIONS}, f, indent=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, frame, timestamp=None, angle=None, detections=()):
+        """Append one uint8 frame (H, W) or (H, W, C); detections are (label, (x, y, w, h)).
+
+        Returns the frame's index. Detections past MAX_DETECTIONS are dropped.
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+
+        record = np.zeros(1, INDEX_DTYPE)
+        record["offset"] = self._frames.tell()
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["angle"] = NO_ANGLE if angle is None else angle
+        record["height"], record["width"], record["channels"] = height, width, channels
+        detections = list(detections)[:MAX_DETECTIONS]
+        record["n_detections"] = len(detections)
+        for i, (label, (x, y, w, h)) in enumerate(detections):
+            if label not in self.labels:
+                self.labels.append(label)
+                self._write_meta()
+            record["detections"][0, i] = (self.labels.index(label), x, y, w, h)
+
+        self._frames.write(memoryview(frame).cast("B"))
+        self._frames.flush()
+        self._index.write(record.tobytes())
+        self._index.flush()
+        self.count += 1
+        return self.count - 1
+
+    def close(self):
+        self._frames.close()
+        self._index.close()
+
+
+class FrameDataset:
+    """Read-only, memory-mapped view of a dataset directory."""
+
+    def __init__(self, path):
+        frames_path, index_path, meta_path = _paths(path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.path = path
+        self.pixel_format = meta["pixel_format"]
+        self.labels = meta["labels"]
+        records = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+        self.index = (np.memmap(index_path, INDEX_DTYPE, mode="r", shape=(records,))
+                      if records else np.zeros(0, INDEX_DTYPE))
+        self._pixels = (np.memmap(frames_path, np.uint8, mode="r")
+                        if records and os.path.getsize(frames_path) else np.zeros(0, np.uint8))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        """Frame i as a read-only array view (no copy, no decode)."""
+        r = self.index[i]
+        offset, h, w, c = int(r["offset"]), int(r["height"]), int(r["width"]), int(r["channels"])
+        pixels = self._pixels[offset:offset + h * w * c]
+        return pixels.reshape((h, w, c) if c > 1 else (h, w))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def frames(self):
+        """All frames as one (N, H, W, C) view; needs a single resolution and no gaps."""
+        if not len(self):
+            raise ValueError("empty dataset")
+        first = self.index[0]
+        shape = (int(first["height"]), int(first["width"]), int(first["channels"]))
+        size = shape[0] * shape[1] * shape[2]
+        same = ((self.index["height"] == shape[0]) & (self.index["width"] == shape[1])
+                & (self.index["channels"] == shape[2])).all()
+        packed = (self.index["offset"] == first["offset"] + size * np.arange(len(self))).all()
+        if not (same and packed):
+            raise ValueError("frames differ in size; index them one at a time")
+        start = int(first["offset"])
+        frames = self._pixels[start:start + size * len(self)].reshape((len(self),) + shape)
+        return frames if shape[2] > 1 else frames[..., 0]
+
+    def detections(self, i):
+        """[(label, (x, y, w, h)), ...] recorded with frame i."""
+        r = self.index[i]
+        return [(self.labels[d["label"]], (int(d["x"]), int(d["y"]), int(d["w"]), int(d["h"])))
+                for d in r["detections"][:r["n_detections"]]]
+
+    def with_label(self, label):
+        """Indices of frames with at least one detection of label."""
+        if label not in self.labels:
+            return np.zeros(0, int)
+        code = self.labels.index(label)
+        slots = np.arange(MAX_DETECTIONS) < self.index["n_detections"][:, None]
+        return np.flatnonzero(((self.index["detections"]["label"] == code) & slots).any(axis=1))
+
+
+def _info(path):
+    ds = FrameDataset(path)
+    print(f"{path}: {len(ds)} frames ({ds.pixel_format}), labels: {', '.join(ds.labels) or '-'}")
+    if len(ds):
+        sizes = {(int(r["width"]), int(r["height"]), int(r["channels"])) for r in ds.index}
+        span = ds.index["timestamp"][-1] - ds.index["timestamp"][0]
+        print(f"  sizes: {', '.join(f'{w}x{h}x{c}' for w, h, c in sorted(sizes))}, span {span:.1f} s")
+        for label in ds.labels:
+            print(f"  {label}: {len(ds.with_label(label))} frames")
+
+
+def _import(source, path):
+    from frame_source import open_source
+    with open_source(source) as frames, FrameDatasetWriter(path) as ds:
+        for frame in frames:
+            ds.append(frame)
+        print(f"{ds.count} frames in {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or build a raw frame dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_info = sub.add_parser("info", help="summarize a dataset")
+    p_info.add_argument("dataset")
+    p_import = sub.add_parser("import", help="append frames from images/video (see frame_source.py)")
+    p_import.add_argument("source")
+    p_import.add_argument("dataset")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        _info(args.dataset)
+    else:
+        _import(args.source, args.dataset)
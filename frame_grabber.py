@@ -0,0 +1,119 @@
+import threading
+import time
+
+import numpy as np
+
+
+class FrameGrabber:
+    """Capture frames on a background thread into a small ring of preallocated buffers.
+
+    capture is any zero-argument callable that returns a frame, e.g.
+    picam2.capture_array. The producer thread copies each new frame into a free
+    slot of the ring and publishes it as the newest frame; frames nobody asked
+    for are simply overwritten (counted in .dropped). latest() hands the
+    consumer the newest frame without waiting for a capture, so capture and
+    OpenCV processing overlap.
+
+    The array returned by latest() stays valid until the next latest() or
+    release() call; copy it if you need to keep it longer.
+    """
+
+    def __init__(self, capture, slots=3):
+        if slots < 3:
+            raise ValueError("need at least 3 slots (newest, in use, being written)")
+        self.capture = capture
+        self.slots = slots
+        self.buffers = None
+        self.stamps = [0.0] * slots    # capture start time of each slot (time.monotonic)
+        self.seqs = [0] * slots
+        self.seq = 0                   # frames captured so far
+        self.dropped = 0               # frames overwritten without being read
+        self.error = None
+
+        self._newest = None            # slot holding the newest frame
+        self._in_use = None            # slot handed out to the consumer
+        self._read_seq = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        with self._cond:
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def latest(self, after=None, timeout=5.0):
+        """Return (frame, seq, timestamp) for the newest frame.
+
+        after: only accept a frame whose capture started at or after this
+        time.monotonic() value, e.g. the moment a servo move was acknowledged.
+        Without it, any frame not yet returned is accepted. Raises TimeoutError
+        if no such frame shows up within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._in_use = None
+            while True:
+                if self.error is not None:
+                    raise RuntimeError("capture thread failed") from self.error
+                slot = self._newest
+                if slot is not None:
+                    fresh = self.stamps[slot] >= after if after is not None else self.seqs[slot] > self._read_seq
+                    if fresh:
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    raise TimeoutError("no new frame from the camera")
+                self._cond.wait(remaining)
+            self._in_use = slot
+            self._read_seq = self.seqs[slot]
+            return self.buffers[slot], self.seqs[slot], self.stamps[slot]
+
+    def release(self):
+        """Give back the frame returned by latest() so the producer may reuse it."""
+        with self._cond:
+            self._in_use = None
+
+    # ---------------- producer ----------------
+    def _run(self):
+        while self._running:
+            started = time.monotonic()
+            try:
+                frame = self.capture()
+            except Exception as e:
+                with self._cond:
+                    self.error = e
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                if self.buffers is None or self.buffers[0].shape != frame.shape or self.buffers[0].dtype != frame.dtype:
+                    self.buffers = [np.empty_like(frame) for _ in range(self.slots)]
+                    self._newest = self._in_use = None
+                slot = next(i for i in range(self.slots) if i != self._newest and i != self._in_use)
+
+            # The slot is neither published nor handed out, so copy without the lock
+            np.copyto(self.buffers[slot], frame)
+
+            with self._cond:
+                if self._newest is not None and self.seqs[self._newest] > self._read_seq:
+                    self.dropped += 1
+                self.seq += 1
+                self.seqs[slot] = self.seq
+                self.stamps[slot] = started
+                self._newest = slot
+                self._cond.notify_all()
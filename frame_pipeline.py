@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+from stage_timing import NULL_TIMES
+
+
+class FramePipeline:
+    """BlockDetect-style frame processing that reuses its buffers from frame to frame.
+
+    prepare() orients the frame (both flips in one cv2.flip call), blurs it and
+    converts it to HSV, writing into arrays owned by the pipeline; detect()
+    thresholds and dilates into two more owned masks. The structuring element
+    is built once. Buffers are (re)allocated only when the frame size changes,
+    and everything returned is only valid until the next prepare().
+    Pass a stage_timing.StageTimes as timer to time each step.
+    """
+
+    def __init__(self, flip_code=-1, blur_ksize=(7, 7), dilate_ksize=(5, 5), blur=True, hsv=True,
+                 timer=NULL_TIMES):
+        self.flip_code = flip_code      # -1: both axes (camera upside down), None: as captured
+        self.blur_ksize = blur_ksize
+        self.blur = blur
+        self.convert_hsv = hsv          # False when only the oriented frame is needed
+        self.kernel = np.ones(dilate_ksize, np.uint8)
+        self.timer = timer
+        self.shape = None
+
+    def _allocate(self, frame):
+        h, w = frame.shape[:2]
+        self.shape = frame.shape[:2]
+        self.oriented = np.empty((h, w, 3), np.uint8)
+        self.blurred = np.empty((h, w, 3), np.uint8) if self.blur else self.oriented
+        self.hsv = np.empty((h, w, 3), np.uint8) if self.convert_hsv else None
+        self.mask = np.empty((h, w), np.uint8)
+        self.dilated = np.empty((h, w), np.uint8)
+
+    def prepare(self, frame):
+        """Orient + blur + HSV into the pipeline's buffers; returns the BGR image to draw on."""
+        if frame.shape[:2] != self.shape:
+            self._allocate(frame)
+        with self.timer.stage("flip"):
+            if frame.shape[2] == 4:
+                # XBGR/XRGB from still configurations: drop the padding byte while copying
+                cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=self.oriented)
+                if self.flip_code is not None:
+                    cv2.flip(self.oriented, self.flip_code, dst=self.oriented)
+            elif self.flip_code is not None:
+                cv2.flip(frame, self.flip_code, dst=self.oriented)
+            else:
+                np.copyto(self.oriented, frame)
+        if self.blur:
+            with self.timer.stage("blur"):
+                cv2.GaussianBlur(self.oriented, self.blur_ksize, 0, dst=self.blurred)
+        if self.convert_hsv:
+            with self.timer.stage("hsv"):
+                cv2.cvtColor(self.blurred, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        return self.blurred
+
+    def color_mask(self, lower, upper):
+        """Dilated inRange mask of the prepared frame (owned buffer); needs hsv=True."""
+        if self.hsv is None:
+            raise ValueError("pipeline was built with hsv=False; use detect_mask()")
+        with self.timer.stage("mask"):
+            cv2.inRange(self.hsv, lower, upper, dst=self.mask)
+            cv2.dilate(self.mask, self.kernel, dst=self.dilated)
+        return self.dilated
+
+    def detect(self, lower, upper, min_area=800):
+        """(x, y, w, h) like detect_single_color (last contour over min_area), or None."""
+        return self._largest(self.color_mask(lower, upper), min_area)
+
+    def detect_mask(self, mask, min_area=800):
+        """detect() for a mask made elsewhere (e.g. color_lut.ColorLUT.mask of this frame)."""
+        with self.timer.stage("mask"):
+            cv2.dilate(mask, self.kernel, dst=self.dilated)
+        return self._largest(self.dilated, min_area)
+
+    def _largest(self, mask, min_area):
+        with self.timer.stage("contours"):
+            contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+            box = None
+            for contour in contours:
+                if cv2.contourArea(contour) > min_area:
+                    box = cv2.boundingRect(contour)
+        return box
@@ -0,0 +1,102 @@
+import struct
+
+# Binary command frames for servoMotor.py on the micro:bit.
+#
+# Every frame is 7 bytes:
+#   [0xA5] [cmd] [data1 lo] [data1 hi] [data2 lo] [data2 hi] [crc8]
+#   cmd   : 1 = servo ("sm"), 2 = PWM DC ("dc"), 3 = digital DC ("dd")
+#   data1 : signed 16-bit little endian (servo number / left motor)
+#   data2 : signed 16-bit little endian (angle / right motor)
+#   crc8  : CRC-8 (poly 0x07, init 0) over cmd, data1 and data2
+#
+# The sync byte lets the receiver find frame boundaries again after noise and
+# the CRC rejects corrupted or merged frames, so frames can be written back to
+# back with no delimiter or reply.
+
+FRAME_SYNC = 0xA5
+FRAME_SIZE = 7
+
+CMD_SERVO = 1
+CMD_PWM_DC = 2
+CMD_DIGITAL_DC = 3
+
+COMMAND_NAMES = {CMD_SERVO: "sm", CMD_PWM_DC: "dc", CMD_DIGITAL_DC: "dd"}
+
+_BODY = struct.Struct("<Bhh")
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """CRC-8 (poly 0x07, init 0), same as crc8() in servoMotor.py."""
+    crc = 0
+    for b in data:
+        crc = _CRC8_TABLE[crc ^ b]
+    return crc
+
+
+def encode_frame(cmd, data1, data2):
+    """Pack one command into a 7-byte frame."""
+    if cmd not in COMMAND_NAMES:
+        raise ValueError(f"unknown command {cmd}")
+    body = _BODY.pack(cmd, int(data1), int(data2))
+    return bytes([FRAME_SYNC]) + body + bytes([crc8(body)])
+
+
+def servo_frame(servo, angle):
+    """servo: 1->P13, 2->P14, 3->P15; angle 0..180."""
+    return encode_frame(CMD_SERVO, servo, max(0, min(180, int(angle))))
+
+
+def pwm_frame(left, right):
+    """Signed PWM setpoints -1023..1023 for the left and right motors."""
+    return encode_frame(CMD_PWM_DC, max(-1023, min(1023, int(left))), max(-1023, min(1023, int(right))))
+
+
+def digital_frame(left, right):
+    """Full on/off drive: sign of left/right picks forward (+1), reverse (-1) or stop (0)."""
+    return encode_frame(CMD_DIGITAL_DC, (left > 0) - (left < 0), (right > 0) - (right < 0))
+
+
+class FrameDecoder:
+    """Incremental decoder: feed() raw bytes, get back complete (cmd, data1, data2) tuples.
+
+    Mirrors read_frames() in servoMotor.py, so it can be used to check a byte
+    stream on the Pi side.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.bad_frames = 0
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        while True:
+            start = self.buffer.find(FRAME_SYNC)
+            if start < 0:
+                self.buffer.clear()
+                break
+            del self.buffer[:start]
+            if len(self.buffer) < FRAME_SIZE:
+                break
+            body = bytes(self.buffer[1:6])
+            if crc8(body) == self.buffer[6] and body[0] in COMMAND_NAMES:
+                frames.append(_BODY.unpack(body))
+                del self.buffer[:FRAME_SIZE]
+            else:
+                # Not a real frame start; resync from the next sync byte
+                self.bad_frames += 1
+                del self.buffer[:1]
+        return frames
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Background JPEG writer for frames captured into memory.
+#
+#   recorder = FrameRecorder("captures", quality=90, workers=2, max_pending=8, policy="drop_oldest")
+#   frame = picam2.capture_array()          # process this array directly...
+#   recorder.submit(frame, "image_0001.jpg") # ...while a worker encodes and writes it
+#   recorder.close()                         # waits for everything queued
+#
+# Encoding and disk writes happen on a small pool of threads (Pillow's JPEG
+# encoder and file writes release the GIL), so the capture loop only pays for
+# queueing a reference. The queue is bounded; when it is full the policy
+# decides what happens:
+#   "block"       - submit() waits for a free slot (nothing is lost, capture slows down)
+#   "drop_newest" - the new frame is not recorded
+#   "drop_oldest" - the oldest queued frame is discarded to make room
+# The recorder keeps a reference to each submitted array until it is written,
+# so do not modify an array after submitting it (submit a copy instead).
+
+POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class FrameRecorder:
+    """Bounded worker pool that JPEG-encodes arrays and writes them to out_dir."""
+
+    def __init__(self, out_dir=".", quality=90, workers=2, max_pending=8, policy="block"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+        self.out_dir = out_dir
+        self.quality = quality
+        self.max_pending = max_pending
+        self.policy = policy
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.encode_seconds = 0.0
+
+        self._queue = deque()           # (array, path, quality)
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, array, filename, quality=None):
+        """Queue an RGB (or grayscale) uint8 array to be written as out_dir/filename.
+
+        Returns False if the frame was dropped by the drop_newest policy.
+        """
+        path = os.path.join(self.out_dir, filename)
+        job = (array, path, self.quality if quality is None else quality)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("recorder is closed")
+            if len(self._queue) >= self.max_pending:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._queue) >= self.max_pending:
+                        self._cond.wait()
+            self._queue.append(job)
+            self._cond.notify_all()
+        return True
+
+    def pending(self):
+        """Frames queued or being written."""
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def flush(self):
+        """Wait until everything submitted so far is on disk."""
+        with self._cond:
+            while self._queue or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        """Write what is queued, then stop the workers."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "failed": self.failed,
+                "pending": self.pending(),
+                "mean_write_ms": 1000 * self.encode_seconds / self.written if self.written else 0.0}
+
+    def _work(self):
+        from PIL import Image
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                array, path, quality = self._queue.popleft()
+                self._busy += 1
+                self._cond.notify_all()
+            start = time.perf_counter()
+            try:
+                Image.fromarray(array).save(path, quality=quality)
+                ok = True
+            except (OSError, ValueError) as e:
+                print(f"[recorder] could not write {path}: {e}")
+                ok = False
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self._busy -= 1
+                if ok:
+                    self.written += 1
+                    self.encode_seconds += elapsed
+                else:
+                    self.failed += 1
+                self._cond.notify_all()
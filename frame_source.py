@@ -0,0 +1,154 @@
+import glob
+import os
+
+import cv2
+
+# Frame sources: something that hands out frames one at a time.
+#
+# Every source has read() -> frame (NumPy array) or None when it runs out,
+# and close(). They can also be iterated and used with "with". read() can be
+# handed straight to FrameGrabber as its capture callable.
+#
+#   PicameraSource  - the robot's camera (Picamera2 is only imported here)
+#   DirectorySource - image files from a folder or glob, in name order
+#   VideoSource     - a recorded video file
+#   DatasetSource   - a frame_dataset.py directory (memory-mapped, no decoding)
+#
+# Replayed frames come from OpenCV and are BGR, like the "RGB888" preview
+# stream BlockDetect.py uses. Still configurations give RGB frames.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".h264")
+
+
+class FrameSource:
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PicameraSource(FrameSource):
+    """Live frames from Picamera2.
+
+    still=False gives the preview configuration BlockDetect.py uses
+    (RGB888 -> BGR arrays); still=True gives a still configuration like
+    camera_program.py and senseDistance.py.
+    """
+
+    def __init__(self, size=(1280, 720), still=False, stream="main", warmup=0.0):
+        from picamera2 import Picamera2
+        self.picam2 = Picamera2()
+        self.stream = stream
+        if still:
+            config = self.picam2.create_still_configuration(main={"size": size})
+        else:
+            config = self.picam2.create_preview_configuration(main={"size": size, "format": "RGB888"})
+        self.picam2.align_configuration(config)
+        self.picam2.configure(config)
+        self.picam2.start()
+        if warmup:
+            import time
+            time.sleep(warmup)
+
+    def read(self):
+        return self.picam2.capture_array(self.stream)
+
+    def close(self):
+        self.picam2.stop()
+        self.picam2.close()
+
+
+class DirectorySource(FrameSource):
+    """Images from a directory (or a glob pattern), sorted by file name."""
+
+    def __init__(self, path, loop=False):
+        if os.path.isdir(path):
+            paths = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            paths = glob.glob(path)
+        self.paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise FileNotFoundError(f"no images found in {path}")
+        self.loop = loop
+        self.index = 0
+
+    def read(self):
+        while True:
+            if self.index >= len(self.paths):
+                if not self.loop:
+                    return None
+                self.index = 0
+            path = self.paths[self.index]
+            self.index += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return frame
+            print(f"Skipping unreadable image {path}")
+
+
+class VideoSource(FrameSource):
+    """Frames from a video file."""
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"cannot open video {path}")
+
+    def read(self):
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return frame if ok else None
+
+    def close(self):
+        self.capture.release()
+
+
+class DatasetSource(FrameSource):
+    """Frames of a frame_dataset.py dataset, in recording order."""
+
+    def __init__(self, path, loop=False):
+        from frame_dataset import FrameDataset
+        self.dataset = FrameDataset(path)
+        if not len(self.dataset):
+            raise FileNotFoundError(f"no frames in dataset {path}")
+        self.loop = loop
+        self.index = 0
+
+    def read(self):
+        if self.index >= len(self.dataset):
+            if not self.loop:
+                return None
+            self.index = 0
+        frame = self.dataset[self.index]
+        self.index += 1
+        return frame
+
+
+def open_source(spec, loop=False, **camera_options):
+    """Pick a source from a string: "camera", a video file, a dataset, a directory or a glob."""
+    if spec == "camera":
+        return PicameraSource(**camera_options)
+    if os.path.isfile(os.path.join(spec, "index.bin")):
+        return DatasetSource(spec, loop=loop)
+    if spec.lower().endswith(VIDEO_EXTENSIONS):
+        return VideoSource(spec, loop=loop)
+    return DirectorySource(spec, loop=loop)
@@ -0,0 +1,257 @@
+import argparse
+import json
+
+import cv2
+import numpy as np
+
+# HSV threshold tuning from labelled frames.
+#
+# Every frame is converted to HSV and histogrammed once (2 hue units x 8 x 8
+# per bin). For each label the tuner keeps two histograms: pixels inside the
+# middle of that label's boxes (positives) and pixels outside all of its
+# boxes (negatives). A summed-volume table over each histogram gives the
+# pixel count inside any HSV box from 8 lookups, so scoring a candidate
+# range never touches an image again and thousands of candidates are scored
+# in one vectorized step.
+#
+# The search is coordinate descent on the box: for one axis at a time every
+# (lower, upper) pair is scored with the other axes fixed, until nothing
+# improves. Hue may wrap (lower > upper), which is how red comes out as one
+# range instead of two hand-made ones. The score is F1 of the mask against
+# the labels.
+#
+#   python hsv_tuner.py runs/sweep1                      # frame_dataset.py dataset with detections
+#   python hsv_tuner.py runs/sweep1 --labels Red --json bounds.json
+
+H_BIN = 2     # OpenCV hue units per bin (hue is 0..179)
+SV_BIN = 8    # saturation/value units per bin
+SHAPE = (180 // H_BIN, 256 // SV_BIN, 256 // SV_BIN)
+CONVERSIONS = {"BGR": cv2.COLOR_BGR2HSV, "RGB": cv2.COLOR_RGB2HSV}
+
+
+def quantize(hsv):
+    """Flat histogram bin of every HSV pixel."""
+    h = hsv[..., 0].astype(np.intp) // H_BIN
+    s = hsv[..., 1].astype(np.intp) // SV_BIN
+    v = hsv[..., 2].astype(np.intp) // SV_BIN
+    return (np.minimum(h, SHAPE[0] - 1) * SHAPE[1] + s) * SHAPE[2] + v
+
+
+def summed_volume(hist):
+    """Zero-padded 3D prefix sum: table[i, j, k] = hist[:i, :j, :k].sum()."""
+    table = np.zeros((SHAPE[0] + 1, SHAPE[1] + 1, SHAPE[2] + 1), np.int64)
+    table[1:, 1:, 1:] = hist.reshape(SHAPE).cumsum(0).cumsum(1).cumsum(2)
+    return table
+
+
+def box_sum(table, lo, hi):
+    """Counts in inclusive bin boxes lo..hi ((K, 3) int arrays, no wrap)."""
+    h0, s0, v0 = lo.T
+    h1, s1, v1 = (hi + 1).T
+    return (table[h1, s1, v1] - table[h0, s1, v1] - table[h1, s0, v1] - table[h1, s1, v0]
+            + table[h0, s0, v1] + table[h0, s1, v0] + table[h1, s0, v0] - table[h0, s0, v0])
+
+
+def wrapped_sum(table, lo, hi):
+    """box_sum where a hue lower bin above its upper bin wraps through 0."""
+    lo = np.asarray(lo).reshape(-1, 3)
+    hi = np.asarray(hi).reshape(-1, 3)
+    wrap = lo[:, 0] > hi[:, 0]
+    total = np.zeros(len(lo), np.int64)
+    if (~wrap).any():
+        total[~wrap] = box_sum(table, lo[~wrap], hi[~wrap])
+    if wrap.any():
+        top = hi[wrap].copy()
+        top[:, 0] = SHAPE[0] - 1
+        bottom = lo[wrap].copy()
+        bottom[:, 0] = 0
+        total[wrap] = box_sum(table, lo[wrap], top) + box_sum(table, bottom, hi[wrap])
+    return total
+
+
+def to_bins(lower, upper):
+    """OpenCV HSV bounds -> inclusive bin box."""
+    lo = np.array([lower[0] // H_BIN, lower[1] // SV_BIN, lower[2] // SV_BIN])
+    hi = np.array([upper[0] // H_BIN, upper[1] // SV_BIN, upper[2] // SV_BIN])
+    return np.minimum(lo, np.array(SHAPE) - 1), np.minimum(hi, np.array(SHAPE) - 1)
+
+
+def to_bounds(lo, hi):
+    """Inclusive bin box -> list of OpenCV (lower, upper) ranges (two when hue wraps)."""
+    def bounds(h0, h1):
+        lower = [int(h0) * H_BIN, int(lo[1]) * SV_BIN, int(lo[2]) * SV_BIN]
+        upper = [min(179, (int(h1) + 1) * H_BIN - 1), (int(hi[1]) + 1) * SV_BIN - 1, (int(hi[2]) + 1) * SV_BIN - 1]
+        return lower, upper
+    if lo[0] > hi[0]:
+        return [bounds(lo[0], SHAPE[0] - 1), bounds(0, hi[0])]
+    return [bounds(lo[0], hi[0])]
+
+
+class HistogramTuner:
+    """Accumulates per-label HSV histograms from labelled frames and searches for the best box."""
+
+    def __init__(self, labels, shrink=0.2):
+        self.labels = list(labels)
+        self.shrink = shrink            # fraction of each box edge left out of the positives
+        size = SHAPE[0] * SHAPE[1] * SHAPE[2]
+        self.pos = {label: np.zeros(size, np.int64) for label in self.labels}
+        self.neg = {label: np.zeros(size, np.int64) for label in self.labels}
+        self.frames = 0
+        self._tables = {}
+
+    def add_frame(self, frame, detections, pixel_format="BGR"):
+        """One frame and its [(label, (x, y, w, h)), ...]; frames without a label's box are all negatives."""
+        if pixel_format == "YUV420":
+            frame = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+            pixel_format = "BGR"
+        bins = quantize(cv2.cvtColor(frame, CONVERSIONS[pixel_format]))
+        size = SHAPE[0] * SHAPE[1] * SHAPE[2]
+        total = np.bincount(bins.ravel(), minlength=size)
+        for label in self.labels:
+            inside = np.zeros(bins.shape, bool)
+            core = np.zeros(bins.shape, bool)
+            for name, (x, y, w, h) in detections:
+                if name != label:
+                    continue
+                inside[y:y + h, x:x + w] = True
+                dx, dy = int(w * self.shrink), int(h * self.shrink)
+                core[y + dy:y + h - dy, x + dx:x + w - dx] = True
+            if inside.any():
+                self.pos[label] += np.bincount(bins[core], minlength=size)
+                self.neg[label] += total - np.bincount(bins[inside], minlength=size)
+            else:
+                self.neg[label] += total
+        self.frames += 1
+        self._tables.clear()
+
+    def add_dataset(self, dataset):
+        """Every frame of a frame_dataset.FrameDataset, labelled by its recorded detections."""
+        for i in range(len(dataset)):
+            self.add_frame(dataset[i], dataset.detections(i), dataset.pixel_format)
+
+    def _table(self, label):
+        if label not in self._tables:
+            self._tables[label] = (summed_volume(self.pos[label]), summed_volume(self.neg[label]))
+        return self._tables[label]
+
+    def score(self, label, lo, hi):
+        """(f1, precision, recall) arrays for bin boxes lo/hi ((K, 3) or (3,))."""
+        pos_table, neg_table = self._table(label)
+        tp = wrapped_sum(pos_table, lo, hi).astype(float)
+        fp = wrapped_sum(neg_table, lo, hi).astype(float)
+        positives = max(pos_table[-1, -1, -1], 1)
+        precision = np.divide(tp, tp + fp, out=np.zeros_like(tp), where=(tp + fp) > 0)
+        recall = tp / positives
+        f1 = np.divide(2 * precision * recall, precision + recall,
+                       out=np.zeros_like(tp), where=(precision + recall) > 0)
+        return f1, precision, recall
+
+    def _axis_candidates(self, lo, hi, axis):
+        n = SHAPE[axis]
+        a, b = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+        keep = a <= b if axis else np.ones_like(a, bool)   # only hue may wrap
+        a, b = a[keep], b[keep]
+        los = np.repeat(lo[None], len(a), axis=0)
+        his = np.repeat(hi[None], len(a), axis=0)
+        los[:, axis] = a
+        his[:, axis] = b
+        return los, his
+
+    def _descend(self, label, lo, hi, max_passes):
+        best = self.score(label, lo, hi)[0][0]
+        for _ in range(max_passes):
+            improved = False
+            for axis in range(3):
+                los, his = self._axis_candidates(lo, hi, axis)
+                f1 = self.score(label, los, his)[0]
+                i = int(np.argmax(f1))
+                if f1[i] > best + 1e-9:
+                    best, lo, hi, improved = f1[i], los[i], his[i], True
+            if not improved:
+                break
+        return best, lo, hi
+
+    def tune(self, label, starts=(), max_passes=8):
+        """Best bin box for a label: {"ranges", "f1", "precision", "recall"}.
+
+        starts are extra (lower, upper) OpenCV bounds to descend from, e.g. the
+        current constants; the search also starts from the dominant hue.
+        """
+        if self.pos[label].sum() == 0:
+            raise ValueError(f"no labelled pixels for {label}")
+        seeds = [to_bins(lower, upper) for lower, upper in starts]
+        hue = self.pos[label].reshape(SHAPE).sum(axis=(1, 2))
+        peak = int(np.argmax(hue))
+        width = 5
+        seeds.append((np.array([(peak - width) % SHAPE[0], 0, 0]),
+                      np.array([(peak + width) % SHAPE[0], SHAPE[1] - 1, SHAPE[2] - 1])))
+        best = None
+        for lo, hi in seeds:
+            result = self._descend(label, np.array(lo), np.array(hi), max_passes)
+            if best is None or result[0] > best[0]:
+                best = result
+        f1, lo, hi = best
+        _, precision, recall = self.score(label, lo, hi)
+        return {"ranges": to_bounds(lo, hi), "f1": float(f1),
+                "precision": float(precision[0]), "recall": float(recall[0])}
+
+    def evaluate(self, label, ranges):
+        """(f1, precision, recall) of existing OpenCV ranges (several are summed, e.g. red1 + red2)."""
+        pos_table, neg_table = self._table(label)
+        tp = fp = 0
+        for lower, upper in ranges:
+            lo, hi = to_bins(lower, upper)
+            tp += wrapped_sum(pos_table, lo, hi)[0]
+            fp += wrapped_sum(neg_table, lo, hi)[0]
+        positives = max(pos_table[-1, -1, -1], 1)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / positives
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return float(f1), float(precision), float(recall)
+
+
+def current_ranges():
+    """{lowercase color: {source: [(lower, upper), ...]}} of the hand-tuned constants."""
+    import BlockDetect
+    import camera_program
+    known = {}
+    for name, lower, upper, tag in BlockDetect.scan_colors:
+        known.setdefault(name.lower(), {})["BlockDetect"] = [(lower.tolist(), upper.tolist())]
+    for color in camera_program.TARGET_COLORS:
+        ranges = [(lower.tolist(), upper.tolist()) for lower, upper in camera_program.target_boxes(color)]
+        known.setdefault(color, {})["camera_program"] = ranges
+    return known
+
+
+if __name__ == "__main__":
+    from frame_dataset import FrameDataset
+
+    parser = argparse.ArgumentParser(description="Tune HSV bounds from a labelled frame dataset")
+    parser.add_argument("dataset", help="frame_dataset.py directory whose frames carry detections")
+    parser.add_argument("--labels", help="comma separated labels (default: all in the dataset)")
+    parser.add_argument("--shrink", type=float, default=0.2, help="box edge fraction left out of positives")
+    parser.add_argument("--json", help="write the tuned bounds here")
+    args = parser.parse_args()
+
+    ds = FrameDataset(args.dataset)
+    labels = args.labels.split(",") if args.labels else ds.labels
+    tuner = HistogramTuner(labels, shrink=args.shrink)
+    tuner.add_dataset(ds)
+    known = current_ranges()
+
+    results = {}
+    for label in labels:
+        existing = known.get(label.lower(), {})
+        starts = [r for ranges in existing.values() for r in ranges]
+        result = tuner.tune(label, starts)
+        results[label] = result
+        print(f"{label}: F1 {result['f1']:.3f} (precision {result['precision']:.3f}, recall {result['recall']:.3f})")
+        for lower, upper in result["ranges"]:
+            print(f"    lower = np.array({lower}, np.uint8)   upper = np.array({upper}, np.uint8)")
+        for source, ranges in existing.items():
+            f1, precision, recall = tuner.evaluate(label, ranges)
+            print(f"    current {source}: F1 {f1:.3f} (precision {precision:.3f}, recall {recall:.3f})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"dataset": args.dataset, "frames": tuner.frames, "bounds": results}, f, indent=1)
@@ -1,6 +1,13 @@
 import time
 from picamera2 import Picamera2
 from datetime import datetime
+from frame_recorder import FrameRecorder
+
+CAPTURE_INTERVAL = 5   # seconds between pictures
+JPEG_QUALITY = 90
+# Encoding/writing runs on worker threads; if the disk falls behind, drop the
+# oldest unwritten frame rather than delaying the next capture
+recorder = FrameRecorder(".", quality=JPEG_QUALITY, workers=2, max_pending=8, policy="drop_oldest")
 
 # Initialize camera
 picam2 = Picamera2()
@@ -16,13 +23,15 @@ try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"image_{timestamp}.jpg"
 
-        # Capture and save image
-        picam2.capture_file(filename)
-        print(f"Saved {filename}")
+        # Capture into memory and queue it for writing
+        recorder.submit(picam2.capture_array(), filename)
+        print(f"Queued {filename}")
 
         # Wait a few seconds before next shot
-        time.sleep(5)  # change this value for faster/slower capture
+        time.sleep(CAPTURE_INTERVAL)  # change this value for faster/slower capture
 
 except KeyboardInterrupt:
     print("Stopping camera...")
     picam2.stop()
+    recorder.close()
+    print(f"Recorder: {recorder.stats()}")
@@ -2,7 +2,9 @@ import time
 import string
 import random
 from picamera2 import Picamera2
-from PIL import Image
+from frame_recorder import FrameRecorder
+
+JPEG_QUALITY = 90
 
 # Function to generate a random 4-character string
 def random_filename(length=4):
@@ -17,11 +19,13 @@ time.sleep(2)
 # Generate random filename
 filename = random_filename() + ".jpg"
 
-# Capture and save the image
-picam2.capture_file(filename)
-print(f"Image saved as {filename}")
-
+# Capture into memory once; the JPEG is encoded and written in the background
+recorder = FrameRecorder(".", quality=JPEG_QUALITY)
 image_array = picam2.capture_array()
+recorder.submit(image_array, filename)
 picam2.stop()
 
+recorder.close()
+print(f"Image saved as {filename}")
+
 
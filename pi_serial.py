@@ -1,34 +1,37 @@
-import serial
 import time
+from serial_channel import CommandChannel, CommandError
 
 # open the serial port to the Micro:bit
-ser = serial.Serial('/dev/ttyACM0', 115200, timeout=1)
+channel = CommandChannel('/dev/ttyACM0', 115200, reply_timeout=2)
 time.sleep(2)  # allow time to connect
 
 def send_message(message):
-    # add newline so Micro:bit's uart.readline() can detect end of command
-    ser.write((message + "\n").encode("utf-8"))
-    print("Sent:", message)
+    # newline is added by the channel so Micro:bit's uart.readline() can detect end of command
+    return channel.send(message)
 
 def receive_message():
-    if ser.in_waiting > 0:
-        return ser.readline().decode("utf-8", errors="ignore").strip()
-    return None
+    return channel.receive_message()
 
 try:
     while True:
         command = input("Enter command (left, right, center): ").strip()
         if not command:
             continue
-        send_message(command)
+        reply = send_message(command)
+
+        # wait exactly until the Micro:bit replies (ack:/err:) instead of a fixed pause
+        try:
+            print("Micro:bit: ack:" + reply.result())
+        except CommandError as e:
+            print("Micro:bit: err:" + str(e))
+        except TimeoutError:
+            print("Micro:bit: no reply")
 
-        # wait a bit for Micro:bit to reply
-        time.sleep(0.1)
         response = receive_message()
-        if response:
+        while response:
             print("Micro:bit:", response)
+            response = receive_message()
 
 except KeyboardInterrupt:
     print("Communication ended.")
-    ser.close()
-
+    channel.close()
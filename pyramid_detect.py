@@ -0,0 +1,139 @@
+import cv2
+import numpy as np
+
+from senseDistance import find_edge_contours
+
+# Coarse-to-fine detection.
+#
+# Candidate blobs/edges are found on a frame shrunk by `scale` (area filter
+# scaled to match), then each candidate's box is grown by `pad` pixels and the
+# original full-resolution detection runs on just that crop. Boxes and gaps
+# come out in full-resolution pixels at close to full-resolution accuracy, but
+# the full-frame blur/HSV/threshold work is replaced by ~scale^2 of it plus a
+# few small crops.
+
+KERNEL_5 = np.ones((5, 5), np.uint8)
+
+
+def downscale(frame, scale):
+    # INTER_AREA averages pixels, which also stands in for the full-frame blur
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def downscale_hsv(frame, scale):
+    """HSV of the shrunk BGR frame; compute once and share it between colors."""
+    return cv2.cvtColor(downscale(frame, scale), cv2.COLOR_BGR2HSV)
+
+
+def _crop_box(box, scale, pad, shape):
+    """Small-frame box -> padded full-resolution crop (x0, y0, x1, y1)."""
+    x, y, w, h = box
+    H, W = shape[:2]
+    grow = pad + int(np.ceil(1 / scale))
+    x0 = max(0, int(x / scale) - grow)
+    y0 = max(0, int(y / scale) - grow)
+    x1 = min(W, int((x + w) / scale) + grow)
+    y1 = min(H, int((y + h) / scale) + grow)
+    return x0, y0, x1, y1
+
+
+def _color_contours(bgr, lower, upper, blur=True, lut=None, label=None):
+    if blur:
+        bgr = cv2.GaussianBlur(bgr, (7, 7), 0)
+    if lut is not None:
+        mask = lut.mask(lut.classify(bgr), label)
+    else:
+        mask = cv2.inRange(cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV), lower, upper)
+    mask = cv2.dilate(mask, KERNEL_5)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def find_color_boxes(frame, lower, upper, scale=0.25, min_area=800, pad=12, small_hsv=None,
+                     lut=None, label=None, small_codes=None):
+    """Full-resolution (x, y, w, h) boxes of blobs in the HSV range, largest first.
+
+    frame is the unblurred BGR frame; crops are blurred (7x7) before refining,
+    like BlockDetect.py does for the whole frame. With a color_lut.ColorLUT
+    as lut, pixels are classified by its label instead of lower/upper, and
+    small_codes (lut.classify of the shrunk frame) replaces small_hsv.
+    """
+    if lut is not None:
+        if small_codes is None:
+            small_codes = lut.classify(downscale(frame, scale))
+        mask = cv2.dilate(lut.mask(small_codes, label), KERNEL_5)
+    else:
+        if small_hsv is None:
+            small_hsv = downscale_hsv(frame, scale)
+        mask = cv2.dilate(cv2.inRange(small_hsv, lower, upper), KERNEL_5)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Lenient coarse filter: small blobs lose area to the shrink
+    coarse_min = 0.5 * min_area * scale * scale
+    boxes = []
+    for c in contours:
+        if cv2.contourArea(c) <= coarse_min:
+            continue
+        x0, y0, x1, y1 = _crop_box(cv2.boundingRect(c), scale, pad, frame.shape)
+        for fine in _color_contours(frame[y0:y1, x0:x1], lower, upper, lut=lut, label=label):
+            area = cv2.contourArea(fine)
+            if area > min_area:
+                x, y, w, h = cv2.boundingRect(fine)
+                box = (x + x0, y + y0, w, h)
+                if box not in [b for a, b in boxes]:
+                    boxes.append((area, box))
+    boxes.sort(key=lambda item: -item[0])
+    return [box for area, box in boxes]
+
+
+def detect_color(frame, lower, upper, scale=0.25, min_area=800, small_hsv=None,
+                 lut=None, label=None, small_codes=None):
+    """Largest refined box or None (the pyramid stand-in for detect_single_color)."""
+    boxes = find_color_boxes(frame, lower, upper, scale, min_area, small_hsv=small_hsv,
+                             lut=lut, label=label, small_codes=small_codes)
+    return boxes[0] if boxes else None
+
+
+def _gap(cnt, edge, h, w):
+    xs = cnt[:, 0, 0]
+    ys = cnt[:, 0, 1]
+    if edge == 'bottom':
+        return h - ys.max()
+    if edge == 'top':
+        return ys.min()
+    if edge == 'left':
+        return xs.min()
+    if edge == 'right':
+        return w - xs.max()
+    raise ValueError("edge must be 'bottom', 'top', 'left', or 'right'")
+
+
+def compute_edge_gap_pyramid(img_bgr, edge='bottom', min_area=1000, scale=0.25, pad=16, candidates=2):
+    """Like senseDistance.compute_edge_gap but coarse-to-fine.
+
+    Returns (gap_in_pixels, contour) with the contour in full-resolution
+    coordinates, or (0, None) when nothing is found (compute_edge_gap also
+    reports 0 then). The closest `candidates` coarse contours are refined so a
+    near-tie at low resolution cannot pick the wrong object.
+    """
+    h, w = img_bgr.shape[:2]
+    small = downscale(img_bgr, scale)
+    sh, sw = small.shape[:2]
+    coarse = find_edge_contours(small, 0.5 * min_area * scale * scale)
+    if not coarse:
+        return 0, None
+    coarse.sort(key=lambda c: _gap(c, edge, sh, sw))
+
+    best_gap, best_cnt = None, None
+    for c in coarse[:candidates]:
+        x0, y0, x1, y1 = _crop_box(cv2.boundingRect(c), scale, pad, img_bgr.shape)
+        for fine in find_edge_contours(img_bgr[y0:y1, x0:x1], min_area):
+            fine = fine + np.array([x0, y0], dtype=fine.dtype)
+            gap = int(_gap(fine, edge, h, w))
+            if best_gap is None or gap < best_gap:
+                best_gap, best_cnt = gap, fine
+    if best_cnt is None:
+        # Refinement lost it; fall back to the coarse estimate
+        c = coarse[0]
+        return int(round(_gap(c, edge, sh, sw) / scale)), (c / scale).astype(np.int32)
+    return best_gap, best_cnt
@@ -0,0 +1,100 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+
+# Range and bearing for detections, from lookup tables built once per camera setup.
+#
+# A calibration maps one pixel measurement of a block to distance:
+#   "bottom" - the row of the block's bottom edge (y + h). The block sits on
+#              the floor, so the lower it appears the closer it is (ground plane).
+#   "height" - the block's height in pixels (bigger is closer).
+# Calibration points are (pixel, distance) pairs measured at the calibration
+# frame size; between points the distance is interpolated linearly and past
+# the ends it is held at the end value. Bearing is the pinhole angle of a
+# column from the optical axis, positive to the right.
+#
+# Ranging(...) turns a calibration into one table entry per possible pixel
+# value (rows 0..H, columns 0..W), so measuring a whole frame's detections is
+# a single indexed lookup:
+#
+#   ranger = get_ranging("blockdetect", (1280, 720))
+#   distance, bearing = ranger.measure([(x, y, w, h), ...])
+#
+# Custom calibrations load from JSON with the same keys as CALIBRATIONS.
+
+FOV_HORIZONTAL = 62.2  # Raspberry Pi Camera v2 horizontal FOV (deg)
+
+CALIBRATIONS = {
+    # BlockDetect.py: 80 - 74 * (y + h) / 700 inches, linear over the whole frame
+    "blockdetect": {
+        "frame_size": [1280, 720],
+        "measure": "bottom",
+        "unit": "in",
+        "points": [[0, 80.0], [720, 80.0 - 74.0 * 720 / 700]],
+    },
+    # camera_program.py: block height in pixels -> cm
+    "camera_program": {
+        "frame_size": [640, 480],
+        "measure": "height",
+        "unit": "cm",
+        "points": [[50, 14.0], [100, 21.0], [150, 29.0], [200, 47.0]],
+    },
+    # senseDistance.py: gap below the block at 2.067 px per cm
+    "sense_distance": {
+        "frame_size": [1920, 1080],
+        "measure": "bottom",
+        "unit": "cm",
+        "points": [[0, 1080 / 2.067], [1080, 0.0]],
+    },
+}
+
+
+def load_calibration(name_or_path):
+    """A built-in calibration by name, or one read from a .json file."""
+    if name_or_path in CALIBRATIONS:
+        return CALIBRATIONS[name_or_path]
+    with open(name_or_path) as f:
+        return json.load(f)
+
+
+class Ranging:
+    """Precomputed distance (per row or height) and bearing (per column) tables for one frame size."""
+
+    def __init__(self, calibration, frame_size, fov=FOV_HORIZONTAL):
+        W, H = frame_size
+        cal_w, cal_h = calibration["frame_size"]
+        self.frame_size = (W, H)
+        self.measure_by = calibration["measure"]
+        self.unit = calibration["unit"]
+
+        # Calibration pixels scale with the frame height (same lens, other resolution)
+        points = np.array(sorted(calibration["points"]), dtype=float)
+        pixels = points[:, 0] * H / cal_h
+        self.distance_lut = np.interp(np.arange(H + 1), pixels, points[:, 1])
+
+        focal = (W / 2) / np.tan(np.radians(fov / 2))
+        self.bearing_lut = np.degrees(np.arctan((np.arange(W + 1) - W / 2) / focal))
+
+    def distance(self, pixels):
+        """Distance for bottom rows (or heights), scalar or array."""
+        index = np.clip(np.rint(pixels).astype(int), 0, len(self.distance_lut) - 1)
+        return self.distance_lut[index]
+
+    def bearing(self, columns):
+        """Bearing in degrees for columns, scalar or array."""
+        index = np.clip(np.rint(columns).astype(int), 0, len(self.bearing_lut) - 1)
+        return self.bearing_lut[index]
+
+    def measure(self, boxes):
+        """(distance, bearing) arrays for (x, y, w, h) boxes, one entry per box."""
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        x, y, w, h = boxes.T
+        pixels = y + h if self.measure_by == "bottom" else h
+        return self.distance(pixels), self.bearing(x + w / 2)
+
+
+@lru_cache(maxsize=None)
+def get_ranging(name_or_path, frame_size, fov=FOV_HORIZONTAL):
+    """Ranging for a calibration and frame size, built on first use and shared after."""
+    return Ranging(load_calibration(name_or_path), tuple(frame_size), fov)
@@ -0,0 +1,123 @@
+import argparse
+
+import numpy as np
+
+from raster_filters import filter_stack
+
+# Raster analysis for many rows at once.
+#
+# Runs the same steps as raster_block_confirmation.py / senseDistanceNew.py
+# (yellow score, moving-average low-pass, high-pass, min/max peak search on the
+# low-pass signal, dominant color by max intensity), but on a whole set of rows
+# of an image in vectorized passes instead of one hard-coded ROW_INDEX.
+#
+# Signals are stacked as (channel, row, x) with channels in CHANNELS order.
+
+CHANNELS = ("Red", "Green", "Blue", "Yellow")
+
+
+def yellow_score(rgb):
+    """Yellow score = (R+G)/2 - 0.3*B, clipped and truncated like yellow_score_line."""
+    rgb = rgb.astype(float)
+    Y = (rgb[..., 0] + rgb[..., 1]) / 2.0 - 0.3 * rgb[..., 2]
+    return np.clip(Y, 0, 255).astype(np.uint8)
+
+
+def channel_stack(rgb, rows):
+    """(4, len(rows), W) float stack of R, G, B and yellow score for the given rows."""
+    lines = rgb[rows, :, :3]
+    stack = np.empty((4,) + lines.shape[:2])
+    stack[:3] = np.moveaxis(lines, -1, 0)
+    stack[3] = yellow_score(lines)
+    return stack
+
+
+def peak_stats(lp):
+    """Vectorized running_min_max over the last axis.
+
+    Returns (min_val, min_x, max_val, max_x), each shaped like lp without its
+    last axis. Values are truncated to int first and the first occurrence
+    wins, as in the per-line loop (a peak sitting exactly on an integer can
+    land one sample apart because of float rounding in the filter).
+    """
+    values = np.trunc(lp).astype(np.int32)
+    min_x = values.argmin(axis=-1)
+    max_x = values.argmax(axis=-1)
+    min_val = np.take_along_axis(values, min_x[..., None], axis=-1)[..., 0]
+    max_val = np.take_along_axis(values, max_x[..., None], axis=-1)[..., 0]
+    return min_val, min_x, max_val, max_x
+
+
+def analyze_rows(rgb, rows=None, kernel_size=15, keep_signals=False, chunk_rows=128):
+    """Raster analysis of every row in rows (default: all rows) of an RGB image.
+
+    Returns a dict of arrays:
+      rows                       (R,)
+      min_val, min_x, max_val, max_x   (4, R) per channel, from the low-pass signal
+      dominant                   (R,) index into CHANNELS of the largest max_val
+      dominant_x, dominant_val   (R,) peak position / value of that channel
+    With keep_signals=True it also holds raw, lp and hp, each (4, R, W).
+    Rows are processed chunk_rows at a time to bound memory on the Pi.
+    """
+    H = rgb.shape[0]
+    rows = np.arange(H) if rows is None else np.clip(np.asarray(rows, dtype=int), 0, H - 1)
+    R = len(rows)
+
+    result = {"rows": rows}
+    for key in ("min_val", "min_x", "max_val", "max_x"):
+        result[key] = np.empty((4, R), dtype=np.int32)
+    if keep_signals:
+        W = rgb.shape[1]
+        for key in ("raw", "lp", "hp"):
+            result[key] = np.empty((4, R, W))
+
+    for start in range(0, R, chunk_rows):
+        part = slice(start, start + chunk_rows)
+        raw = channel_stack(rgb, rows[part])
+        lp, hp = filter_stack(raw, kernel_size)
+        stats = peak_stats(lp)
+        for key, value in zip(("min_val", "min_x", "max_val", "max_x"), stats):
+            result[key][:, part] = value
+        if keep_signals:
+            result["raw"][:, part] = raw
+            result["lp"][:, part] = lp
+            result["hp"][:, part] = hp
+
+    dominant = result["max_val"].argmax(axis=0)
+    result["dominant"] = dominant
+    result["dominant_x"] = np.take_along_axis(result["max_x"], dominant[None], axis=0)[0]
+    result["dominant_val"] = np.take_along_axis(result["max_val"], dominant[None], axis=0)[0]
+    return result
+
+
+def confirm_block(result):
+    """Vote across rows: (color name, share of rows, median peak x of that color)."""
+    counts = np.bincount(result["dominant"], minlength=len(CHANNELS))
+    winner = int(counts.argmax())
+    xs = result["dominant_x"][result["dominant"] == winner]
+    return CHANNELS[winner], counts[winner] / len(result["dominant"]), int(np.median(xs))
+
+
+if __name__ == "__main__":
+    from PIL import Image
+
+    parser = argparse.ArgumentParser(description="Multi-row raster analysis of an image")
+    parser.add_argument("image")
+    parser.add_argument("--first", type=int, default=0, help="first row")
+    parser.add_argument("--last", type=int, default=None, help="last row (default: bottom)")
+    parser.add_argument("--step", type=int, default=10, help="analyze every step-th row")
+    parser.add_argument("--kernel", type=int, default=15, help="low-pass kernel size")
+    args = parser.parse_args()
+
+    rgb = np.array(Image.open(args.image).convert("RGB"), dtype=np.uint8)
+    H, W = rgb.shape[:2]
+    last = H - 1 if args.last is None else args.last
+    result = analyze_rows(rgb, np.arange(args.first, last + 1, args.step), args.kernel)
+
+    print(f"Image: {args.image} | size = {W}x{H} | {len(result['rows'])} rows")
+    for i, row in enumerate(result["rows"]):
+        peaks = "  ".join(f"{name[0]}={result['max_val'][c, i]:3d}@{result['max_x'][c, i]:<5d}"
+                          for c, name in enumerate(CHANNELS))
+        print(f"row {row:5d}: {peaks} -> {CHANNELS[result['dominant'][i]]}")
+    color, share, x = confirm_block(result)
+    print(f"==> Dominant color is {color} in {100 * share:.0f}% of rows (median peak x={x})")
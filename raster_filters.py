@@ -0,0 +1,66 @@
+import numpy as np
+
+# Moving-average (low-pass) and high-pass filters for raster signals.
+#
+# Filters run along the last axis of any stack, e.g. (channels, rows, width),
+# in one call. The moving average comes from a running sum, so the cost per
+# sample is the same for a 15-tap kernel as for a 151-tap one. Output lines up
+# with np.convolve(signal, np.ones(k) / k, mode="same"): zero padding, and for
+# even k the window reaches one sample further left than right.
+
+
+def _window_bounds(width, kernel_size):
+    """Start/stop indices into the running sum for every output sample."""
+    x = np.arange(width)
+    stop = np.minimum(x + (kernel_size - 1) // 2 + 1, width)
+    start = np.maximum(x - kernel_size // 2, 0)
+    return start, stop
+
+
+def moving_average(stack, kernel_size=15):
+    """Low-pass: moving average along the last axis, O(width) per line."""
+    stack = np.asarray(stack, dtype=float)
+    width = stack.shape[-1]
+    csum = np.zeros(stack.shape[:-1] + (width + 1,))
+    np.cumsum(stack, axis=-1, out=csum[..., 1:])
+    start, stop = _window_bounds(width, kernel_size)
+    lp = csum[..., stop]
+    lp -= csum[..., start]
+    lp /= kernel_size
+    return lp
+
+
+def filter_stack(stack, kernel_size=15):
+    """(low-pass, high-pass) of a stack; high-pass reuses the low-pass (original - low-pass)."""
+    stack = np.asarray(stack, dtype=float)
+    lp = moving_average(stack, kernel_size)
+    return lp, stack - lp
+
+
+class LineFilter:
+    """Streaming low/high-pass for one raster line at a time from live frames.
+
+    All buffers are allocated once for a (channels, width) line; apply() fills
+    and returns them, so the arrays are only valid until the next call.
+    """
+
+    def __init__(self, width, channels=4, kernel_size=15):
+        self.width = width
+        self.kernel_size = kernel_size
+        self.start, self.stop = _window_bounds(width, kernel_size)
+        self.line = np.empty((channels, width))
+        self.csum = np.zeros((channels, width + 1))
+        self.lower = np.empty((channels, width))
+        self.lp = np.empty((channels, width))
+        self.hp = np.empty((channels, width))
+
+    def apply(self, line):
+        """line: (channels, width) values -> (low-pass, high-pass)."""
+        np.copyto(self.line, line)
+        np.cumsum(self.line, axis=-1, out=self.csum[:, 1:])
+        np.take(self.csum, self.stop, axis=-1, out=self.lp)
+        np.take(self.csum, self.start, axis=-1, out=self.lower)
+        self.lp -= self.lower
+        self.lp /= self.kernel_size
+        np.subtract(self.line, self.lp, out=self.hp)
+        return self.lp, self.hp
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from raster_engine import CHANNELS
+
+# Compact raster-analysis records, with plots rendered later on demand.
+#
+# A record is two files next to each other:
+#   <name>.npz  - compressed signals: raw (uint8), low-pass and high-pass (float32),
+#                 each (4, W) in CHANNELS order
+#   <name>.json - the numbers: image, row, per-channel min/max peaks, dominant
+#                 color and crop bounds
+# Writing one takes a few milliseconds, so it can run in the live loop. The
+# plots raster_block_confirmation.py used to draw every run come from
+#   python raster_record.py <name>.json [--out DIR]
+
+LINE_COLORS = {"Red": "red", "Green": "green", "Blue": "blue", "Yellow": "gold"}
+
+
+def save_record(base_path, raw, lp, hp, summary):
+    """Write <base_path>.npz (signals) and <base_path>.json (summary dict). Returns the JSON path."""
+    np.savez_compressed(base_path + ".npz",
+                        raw=np.clip(np.rint(raw), 0, 255).astype(np.uint8),
+                        lp=lp.astype(np.float32),
+                        hp=hp.astype(np.float32))
+    json_path = base_path + ".json"
+    with open(json_path, "w") as f:
+        json.dump(summary, f, indent=1)
+    return json_path
+
+
+def load_record(path):
+    """Load a record from its .json or .npz path (or the shared base name)."""
+    base = path[:-5] if path.endswith(".json") else path[:-4] if path.endswith(".npz") else path
+    with open(base + ".json") as f:
+        record = json.load(f)
+    with np.load(base + ".npz") as signals:
+        for key in ("raw", "lp", "hp"):
+            record[key] = signals[key].astype(float)
+    return record
+
+
+def _save_single_plot(plt, x, y, label, line_color, title, out_path):
+    plt.figure(figsize=(10, 4))
+    plt.plot(x, y, label=label, color=line_color, linewidth=1.5)
+    plt.xlabel("Pixel column (x)")
+    plt.ylabel("Intensity (0–255)")
+    plt.title(title)
+    plt.grid(True, linewidth=0.4)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=150)
+    plt.close()
+
+
+def render_plots(record, out_dir, dpi=150):
+    """Draw the per-channel and summary plots (and image copy/crop when the image is around)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if isinstance(record, str):
+        record = load_record(record)
+    os.makedirs(out_dir, exist_ok=True)
+    row = record["row"]
+    X = np.arange(record["raw"].shape[1])
+
+    for c, name in enumerate(CHANNELS):
+        color = LINE_COLORS[name]
+        _save_single_plot(plt, X, record["raw"][c], f"{name} (original)", color,
+                          f"{name} Channel – Original", os.path.join(out_dir, f"{name}_original.png"))
+        _save_single_plot(plt, X, record["lp"][c], f"{name} (low-pass)", color,
+                          f"{name} Channel – Low-pass Filtered", os.path.join(out_dir, f"{name}_lowpass.png"))
+        _save_single_plot(plt, X, record["hp"][c], f"{name} (high-pass)", color,
+                          f"{name} Channel – High-pass Filtered", os.path.join(out_dir, f"{name}_highpass.png"))
+
+    # Summary plot with all channels and the dominant peak
+    dominant = record["dominant"]
+    plt.figure(figsize=(12, 5))
+    for c, name in enumerate(CHANNELS):
+        plt.plot(X, record["lp"][c], color=LINE_COLORS[name], label=f"{name} (LP)")
+    plt.axvline(dominant["x"], color="black", linestyle="--", linewidth=1)
+    plt.text(dominant["x"] + 5, dominant["value"], f"{dominant['color']} Peak",
+             color="black", fontsize=10, weight="bold")
+    plt.xlabel("Pixel column (x)")
+    plt.ylabel("Intensity (0–255)")
+    plt.title(f"Raster line (row {row}) – All Channels\nDominant = {dominant['color']}")
+    plt.legend()
+    plt.grid(True, linewidth=0.4)
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, "summary_all_channels.png"), dpi=dpi)
+    plt.close()
+
+    # Image copy and crop around the dominant block, if the source image is still there
+    image_path = record.get("image")
+    if image_path and os.path.exists(image_path):
+        from PIL import Image
+        rgb = np.array(Image.open(image_path).convert("RGB"), dtype=np.uint8)
+        Image.fromarray(rgb).save(os.path.join(out_dir, "captured_frame_copy.jpg"))
+        left, right = record["crop"]
+        Image.fromarray(rgb[:, left:right, :]).save(os.path.join(out_dir, "dominant_block_crop.jpg"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render plots from a saved raster record")
+    parser.add_argument("record", help="record .json/.npz path")
+    parser.add_argument("--out", default=None, help="output directory (default: next to the record)")
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.dirname(os.path.abspath(args.record))
+    render_plots(args.record, out_dir)
+    print("[OK] Rendered plots to:", os.path.abspath(out_dir))
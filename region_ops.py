@@ -0,0 +1,61 @@
+import numpy as np
+
+# Whole-array versions of the per-pixel helpers from colorDetectArray.py and
+# default_array_camera.py. Images are NumPy arrays indexed [row, column, channel]
+# (i.e. [y, x]); boxes are given as ANx = [ix, fx] columns and ANy = [iy, fy] rows.
+# Colors only touch the first len(color) channels, so 4-channel XBGR/XRGB
+# arrays from Picamera2 work as well as 3-channel RGB.
+
+REFERENCE_COLORS = [(0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+
+def draw_box(ia, ANx, ANy, color=(0, 0, 0)):
+    """Outline of the box in place (same pixels as the old pbox)."""
+    ix, fx = ANx
+    iy, fy = ANy
+    n = len(color)
+    ia[iy, ix:fx, :n] = color
+    ia[fy, ix:fx, :n] = color
+    ia[iy:fy, ix, :n] = color
+    ia[iy:fy, fx, :n] = color
+    return ia
+
+
+def region_stats(ia, ANx, ANy):
+    """Per-channel min/max inside the box: (Amin, Amax, Bmin, Bmax, Cmin, Cmax), like cbox."""
+    ix, fx = ANx
+    iy, fy = ANy
+    region = ia[iy:fy, ix:fx]
+    stats = []
+    for ch in range(3):
+        stats += [region[..., ch].min(), region[..., ch].max()]
+    return tuple(stats)
+
+
+def range_mask(ia, lows, highs):
+    """Boolean (H, W) mask of pixels whose first three channels lie in [lows, highs]."""
+    mask = np.ones(ia.shape[:2], dtype=bool)
+    for ch in range(3):
+        lo, hi = int(lows[ch]), int(highs[ch])
+        if hi < lo:
+            mask[:] = False
+            return mask
+        # lo <= x <= hi  <=>  (x - lo) <= (hi - lo) with uint8 wrap-around: one compare per channel
+        mask &= (ia[..., ch] - np.uint8(lo)) <= np.uint8(hi - lo)
+    return mask
+
+
+def blackout_range(ia, Amin, Amax, Bmin, Bmax, Cmin, Cmax):
+    """Set every pixel inside the color range to black, in place (replaces rbox)."""
+    keep = ~range_mask(ia, (Amin, Bmin, Cmin), (Amax, Bmax, Cmax))
+    # Multiplying by 0/1 is much cheaper than boolean-index assignment
+    rgb = ia[..., :3]
+    np.multiply(rgb, keep.view(np.uint8)[..., None], out=rgb)
+    return ia
+
+
+def paint_reference_blocks(ia, a, b, c, d, colors=REFERENCE_COLORS):
+    """Row of c-wide, d-tall reference swatches, top-left corner at row a, column b."""
+    for k, color in enumerate(colors):
+        ia[a:a + d, b + k * c:b + (k + 1) * c, :len(color)] = color
+    return ia
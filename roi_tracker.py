@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class RoiTracker:
+    """Follow one block across frames by only searching a window around where it should be.
+
+    detect is any function frame -> (x, y, w, h) or None, e.g. camera_program.find_target
+    or a wrapper around BlockDetect.detect_single_color. It is called on a view
+    of the frame, so its box is relative to that window; update() converts it
+    back to full-frame coordinates.
+
+    Prediction is constant velocity on the box center (smoothed), plus any
+    known camera motion given through shift(), e.g. a servo pan. If the block
+    is not in the predicted window the same frame gets a full-frame search;
+    after max_misses frames without the block the track is dropped.
+    """
+
+    def __init__(self, detect, pad=0.5, min_pad=32, max_misses=2, smoothing=0.5):
+        self.detect = detect
+        self.pad = pad                  # window margin as a fraction of the box size
+        self.min_pad = min_pad          # ... but at least this many pixels
+        self.max_misses = max_misses
+        self.smoothing = smoothing      # weight of the newest motion in the velocity
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self.velocity = np.zeros(2)
+        self.pending_shift = np.zeros(2)
+        self.misses = 0
+
+    def shift(self, dx, dy):
+        """Tell the tracker the scene will move by (dx, dy) pixels before the next frame."""
+        self.pending_shift += (dx, dy)
+
+    def predict(self):
+        """Predicted (x, y, w, h) for the next frame, or None without a track."""
+        if self.box is None:
+            return None
+        x, y, w, h = self.box
+        dx, dy = self.velocity + self.pending_shift
+        return x + dx, y + dy, w, h
+
+    def window(self, frame_shape):
+        """Search window (x0, y0, x1, y1) around the prediction, clipped to the frame."""
+        x, y, w, h = self.predict()
+        speed = np.abs(self.velocity)
+        pad_x = max(self.min_pad, self.pad * w) + speed[0]
+        pad_y = max(self.min_pad, self.pad * h) + speed[1]
+        H, W = frame_shape[:2]
+        x0 = int(max(0, x - pad_x))
+        y0 = int(max(0, y - pad_y))
+        x1 = int(min(W, x + w + pad_x))
+        y1 = int(min(H, y + h + pad_y))
+        return x0, y0, x1, y1
+
+    def update(self, frame):
+        """Find the block in this frame; returns (x, y, w, h) or None."""
+        box = None
+        if self.box is not None:
+            x0, y0, x1, y1 = self.window(frame.shape)
+            if x1 > x0 and y1 > y0:
+                self.roi_frames += 1
+                found = self.detect(frame[y0:y1, x0:x1])
+                if found is not None:
+                    box = (found[0] + x0, found[1] + y0, found[2], found[3])
+        if box is None:
+            # Lost (or no track yet): search the whole frame
+            self.full_frames += 1
+            box = self.detect(frame)
+
+        if box is None:
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.reset()
+            return None
+
+        if self.box is not None:
+            old = np.array([self.box[0] + self.box[2] / 2, self.box[1] + self.box[3] / 2])
+            new = np.array([box[0] + box[2] / 2, box[1] + box[3] / 2])
+            # Motion we were told about is not the block's own velocity;
+            # spread the rest over the frames since it was last seen
+            moved = (new - old - self.pending_shift) / (self.misses + 1)
+            self.velocity = self.smoothing * moved + (1 - self.smoothing) * self.velocity
+        self.box = tuple(int(v) for v in box)
+        self.pending_shift = np.zeros(2)
+        self.misses = 0
+        return self.box
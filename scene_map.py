@@ -0,0 +1,155 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+# What the head saw at each servo angle, so a scan can start from memory.
+#
+#   scene = SceneMap(max_age=120)
+#   scene.update(angle, [("Red", (x, y, w, h))], frame, labels=["Green", "Red", "Blue"])
+#   scene.locate("Red")                  # -> (angle, box) from the map, or None
+#   scene.unchanged(angle, new_frame)    # cheap check before trusting an entry
+#   scene.save("scene.npz"); scene = SceneMap.load("scene.npz", max_age=120)
+#
+# Every visited angle keeps its detections, the time they were confirmed and a
+# small thumbnail of the frame. An entry older than max_age seconds is stale:
+# locate() ignores it and stale_first() puts it at the front of a sweep.
+# Comparing a new frame's thumbnail against the stored one says whether the
+# view at that angle changed; a block covers only a few thumbnail pixels, so the
+# test counts changed pixels instead of averaging them away. On an unchanged
+# arena one frame per known block angle confirms the whole map. Timestamps are
+# wall-clock so a saved map can be reused, and aged, by the next run.
+
+THUMB_SIZE = (80, 45)     # (w, h) of stored thumbnails, 1/16 of a 1280x720 frame
+CHANGE_LEVEL = 24         # per-channel difference (0-255) that marks a thumbnail pixel as changed
+CHANGE_PIXELS = 4         # changed thumbnail pixels that make the whole view changed
+
+
+def thumbnail(frame, size=THUMB_SIZE):
+    """Area-averaged small copy of a frame (any channel count) for change checks."""
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+class SceneMap:
+    """Detections and thumbnails per servo angle with time-based invalidation."""
+
+    def __init__(self, max_age=120.0, change_level=CHANGE_LEVEL, change_pixels=CHANGE_PIXELS,
+                 thumb_size=THUMB_SIZE, clock=time.time):
+        self.max_age = max_age
+        self.change_level = change_level
+        self.change_pixels = change_pixels
+        self.thumb_size = thumb_size
+        self.clock = clock
+        self.entries = {}     # angle -> {"time", "detections": {label: box}, "thumb"}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _now(self, now):
+        return self.clock() if now is None else now
+
+    def update(self, angle, detections, frame=None, labels=None, now=None):
+        """Record what a frame at angle showed; detections are [(label, (x, y, w, h)), ...].
+
+        labels are the colors that were looked for (default: those detected);
+        their old boxes at this angle are replaced, other labels are kept.
+        """
+        entry = self.entries.setdefault(angle, {"time": 0.0, "detections": {}, "thumb": None})
+        found = {label: tuple(int(v) for v in box) for label, box in detections}
+        for label in (found if labels is None else labels):
+            entry["detections"].pop(label, None)
+        entry["detections"].update(found)
+        entry["time"] = self._now(now)
+        if frame is not None:
+            entry["thumb"] = thumbnail(frame, self.thumb_size)
+
+    def touch(self, angle, now=None):
+        """Mark an entry as confirmed now without changing it."""
+        if angle in self.entries:
+            self.entries[angle]["time"] = self._now(now)
+
+    def invalidate(self, angle=None):
+        """Forget one angle, or the whole map."""
+        if angle is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(angle, None)
+
+    def fresh(self, angle, now=None):
+        entry = self.entries.get(angle)
+        return entry is not None and self._now(now) - entry["time"] <= self.max_age
+
+    def stale_first(self, angles, now=None):
+        """angles reordered so never-seen and stale ones come first, each group in the given order."""
+        now = self._now(now)
+        return sorted(angles, key=lambda angle: self.fresh(angle, now))
+
+    def unchanged(self, angle, frame):
+        """True if frame looks like the stored view at angle (False when there is nothing to compare)."""
+        entry = self.entries.get(angle)
+        thumb = thumbnail(frame, self.thumb_size)
+        if entry is None or entry["thumb"] is None or entry["thumb"].shape != thumb.shape:
+            return False
+        diff = cv2.absdiff(thumb, entry["thumb"])
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        return int(np.count_nonzero(diff > self.change_level)) < self.change_pixels
+
+    def sightings(self, label, now=None):
+        """[(angle, box, time), ...] of fresh entries that hold label, newest first."""
+        now = self._now(now)
+        hits = [(angle, entry["detections"][label], entry["time"])
+                for angle, entry in self.entries.items()
+                if label in entry["detections"] and now - entry["time"] <= self.max_age]
+        return sorted(hits, key=lambda hit: -hit[2])
+
+    def locate(self, label, center_x=None, now=None):
+        """(angle, box) of label from fresh entries, or None.
+
+        With center_x, the sighting whose box center is nearest that column
+        wins (the most centered view of the block); otherwise the newest.
+        """
+        hits = self.sightings(label, now)
+        if not hits:
+            return None
+        if center_x is not None:
+            hits.sort(key=lambda hit: abs(hit[1][0] + hit[1][2] / 2 - center_x))
+        angle, box, _ = hits[0]
+        return angle, box
+
+    def save(self, path):
+        """Write the map to an .npz file (atomically)."""
+        angles = sorted(self.entries)
+        meta = [{"angle": angle, "time": self.entries[angle]["time"],
+                 "detections": {label: list(box) for label, box in self.entries[angle]["detections"].items()}}
+                for angle in angles]
+        thumbs = {f"thumb_{i}": self.entries[angle]["thumb"]
+                  for i, angle in enumerate(angles) if self.entries[angle]["thumb"] is not None}
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, meta=np.array(json.dumps(meta)), **thumbs)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """SceneMap from save(); an empty one if the file is missing or unreadable."""
+        scene = cls(**kwargs)
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                thumbs = {name: data[name] for name in data.files if name.startswith("thumb_")}
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(path):
+                print(f"[scene_map] ignoring {path}: {e}")
+            return scene
+        for i, item in enumerate(meta):
+            thumb = thumbs.get(f"thumb_{i}")
+            if thumb is not None and thumb.shape[1::-1] != tuple(scene.thumb_size):
+                thumb = None
+            scene.entries[item["angle"]] = {
+                "time": item["time"],
+                "detections": {label: tuple(box) for label, box in item["detections"].items()},
+                "thumb": thumb,
+            }
+        return scene
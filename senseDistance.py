@@ -3,21 +3,15 @@ import string
 import random
 import cv2
 import numpy as np
-from picamera2 import Picamera2
 from PIL import Image
+
+from ranging import get_ranging
 # Function to generate a random 4-character string
 def random_filename(length=4):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
-def compute_edge_gap(img_bgr, edge='bottom', min_area=1000):
-    """
-    Returns gap_in_pixels, annotated_bgr
-    - img_bgr: OpenCV BGR image
-    - edge: 'bottom' | 'top' | 'left' | 'right'
-    - min_area: ignore tiny contours (noise)
-    """
-    h, w = img_bgr.shape[:2]
-
+def find_edge_contours(img_bgr, min_area=1000):
+    """Steps 1-2 of compute_edge_gap: strong edges -> external contours larger than min_area."""
     # 1) Preprocess to find strong edges
     gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
     # Light blur to reduce noise; increase kernel size if noisy
@@ -32,34 +26,70 @@ def compute_edge_gap(img_bgr, edge='bottom', min_area=1000):
 
     # 2) Find contours
     cnts, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-# Filter out tiny contours
+    # Filter out tiny contours
     cnts = [c for c in cnts if cv2.contourArea(c) > min_area]
-    if not cnts:
-        # No object found; return 0 and original image
-        return 0, img_bgr.copy()
+    return cnts
 
-    # Heuristic: choose the contour closest to the requested edge
-    def distance_to_edge(cnt):
-        if edge == 'bottom':
-            y_max = cnt[:, 0, 1].max()
-            return h - y_max
-        elif edge == 'top':
-            y_min = cnt[:, 0, 1].min()
-            return y_min
-        elif edge == 'left':
-            x_min = cnt[:, 0, 0].min()
-            return x_min
-        elif edge == 'right':
-            x_max = cnt[:, 0, 0].max()
-            return w - x_max
-        else:
-            raise ValueError("edge must be 'bottom', 'top', 'left', or 'right'")
+EDGES = ('bottom', 'top', 'left', 'right')
 
+def edge_band(shape, edge, band):
+    """(x0, y0, x1, y1) of the strip covering `band` (0-1] of the image next to edge."""
+    h, w = shape[:2]
+    if edge == 'bottom':
+        return 0, h - int(round(h * band)), w, h
+    if edge == 'top':
+        return 0, 0, w, int(round(h * band))
+    if edge == 'left':
+        return 0, 0, int(round(w * band)), h
+    if edge == 'right':
+        return w - int(round(w * band)), 0, w, h
+    raise ValueError("edge must be 'bottom', 'top', 'left', or 'right'")
+
+def edge_gaps(cnts, edge, h, w):
+    """Gap from every contour to the edge, reduced over all their points at once."""
+    if edge not in EDGES:
+        raise ValueError("edge must be 'bottom', 'top', 'left', or 'right'")
+    points = np.concatenate(cnts)[:, 0]
+    starts = np.cumsum([0] + [len(c) for c in cnts[:-1]])
+    if edge == 'bottom':
+        return h - np.maximum.reduceat(points[:, 1], starts)
+    if edge == 'top':
+        return np.minimum.reduceat(points[:, 1], starts)
+    if edge == 'left':
+        return np.minimum.reduceat(points[:, 0], starts)
+    return w - np.maximum.reduceat(points[:, 0], starts)
+
+def measure_edge_gap(img_bgr, edge='bottom', min_area=1000, band=None):
+    """
+    Returns gap_in_pixels, contour (full-image coordinates) of the object
+    closest to the edge, or 0, None when there is none. No annotation.
+    - band: only look for edges in this fraction of the image next to the
+      edge (e.g. 0.5 = the half nearest it); None searches the whole image.
+      The closest object is still found as long as enough of it
+      (min_area) lies inside the band.
+    """
+    h, w = img_bgr.shape[:2]
+    x0, y0 = 0, 0
+    if band is not None:
+        x0, y0, x1, y1 = edge_band(img_bgr.shape, edge, band)
+        img_bgr = img_bgr[y0:y1, x0:x1]
+    elif edge not in EDGES:
+        raise ValueError("edge must be 'bottom', 'top', 'left', or 'right'")
+
+    cnts = find_edge_contours(img_bgr, min_area)
+    if not cnts:
+        return 0, None
+    gaps = edge_gaps(cnts, edge, h - y0, w - x0)
     # Pick the object that minimizes the gap to that edge (closest object)
-    target_cnt = min(cnts, key=distance_to_edge)
-    gap = int(round(distance_to_edge(target_cnt)))
-
-    # 3) Make an annotated image for visual verification
+    i = int(np.argmin(gaps))
+    target_cnt = cnts[i]
+    if x0 or y0:
+        target_cnt = target_cnt + np.array([x0, y0], dtype=target_cnt.dtype)
+    return int(gaps[i]), target_cnt
+
+def annotate_edge_gap(img_bgr, target_cnt, gap, edge='bottom'):
+    """Copy of the image with the measured contour and its gap to the edge drawn on it."""
+    h, w = img_bgr.shape[:2]
     annotated = img_bgr.copy()
     cv2.drawContours(annotated, [target_cnt], -1, (0, 255, 0), 2)
 
@@ -90,43 +120,90 @@ def compute_edge_gap(img_bgr, edge='bottom', min_area=1000):
         cv2.line(annotated, (x_max, y_at), (w-1, y_at), (255, 0, 0), 2)
         cv2.putText(annotated, f"Gap: {gap}px (right)", (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
+    return annotated
 
-    return gap, annotated
-
-# ---- Your existing capture flow ----
-picam2 = Picamera2()
-camera_config = picam2.create_still_configuration(main={"size": (1920,1080)})
-picam2.configure(camera_config)
-picam2.start()
-time.sleep(2)
-
-# Generate random filename
-filename = random_filename() + ".jpg"
-
-# Capture and save the image
-picam2.capture_file(filename)
-print(f"Image saved as {filename}")
-
-# Also grab the frame into numpy for processing
-image_array = picam2.capture_array()  # RGB array
-picam2.stop()
-
-# Convert RGB (Picamera2) -> BGR (OpenCV)
-img_bgr = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-
-# Choose which edge to measure from:
-EDGE = 'bottom'  # 'bottom' | 'top' | 'left' | 'right'
-
-gap_px, annotated = compute_edge_gap(img_bgr, edge=EDGE, min_area=1500)
-print(f"Gap from {EDGE} edge to object: {gap_px} pixels")
-
-# Convert pixels to centimeters
-gap_cm = gap_px / 2.067
-
-print(f"Gap from {EDGE} edge to object: {gap_px} pixels ({gap_cm:.2f} cm)")
-
-# Save an annotated image so you can verify visually
-annotated_name = filename.replace(".jpg", f"_annotated_{EDGE}.jpg")
-cv2.imwrite(annotated_name, annotated)
-print(f"Annotated preview saved as {annotated_name}")
+def compute_edge_gap(img_bgr, edge='bottom', min_area=1000, band=None, annotate=True):
+    """
+    Returns gap_in_pixels, annotated_bgr
+    - img_bgr: OpenCV BGR image
+    - edge: 'bottom' | 'top' | 'left' | 'right'
+    - min_area: ignore tiny contours (noise)
+    - band: restrict edge detection to this fraction of the image next to edge
+      (see measure_edge_gap); None uses the whole image
+    - annotate: False skips the annotated copy and returns None in its place,
+      for measuring every frame while driving up to a block
+    """
+    gap, target_cnt = measure_edge_gap(img_bgr, edge, min_area, band)
+    if not annotate:
+        return gap, None
+    if target_cnt is None:
+        # No object found; return 0 and original image
+        return 0, img_bgr.copy()
 
+    # 3) Make an annotated image for visual verification
+    return gap, annotate_edge_gap(img_bgr, target_cnt, gap, edge)
+
+# Only capture when run as a script, so compute_edge_gap() can be imported
+if __name__ == "__main__":
+    # ---- Your existing capture flow ----
+    from picamera2 import Picamera2
+
+    picam2 = Picamera2()
+    camera_config = picam2.create_still_configuration(main={"size": (1920,1080)})
+    picam2.configure(camera_config)
+    picam2.start()
+    time.sleep(2)
+
+    # Generate random filename
+    filename = random_filename() + ".jpg"
+
+    # Capture and save the image
+    picam2.capture_file(filename)
+    print(f"Image saved as {filename}")
+
+    # Also grab the frame into numpy for processing
+    image_array = picam2.capture_array()  # RGB array
+
+    # Keep the raw frame for offline analysis (frame_dataset.py); None records nothing
+    DATASET_DIR = None
+    if DATASET_DIR:
+        from frame_dataset import FrameDatasetWriter
+        with FrameDatasetWriter(DATASET_DIR, pixel_format="RGB") as dataset:
+            dataset.append(image_array)
+
+    # Convert RGB (Picamera2) -> BGR (OpenCV)
+    img_bgr = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
+
+    # Choose which edge to measure from:
+    EDGE = 'bottom'  # 'bottom' | 'top' | 'left' | 'right'
+
+    gap_px, annotated = compute_edge_gap(img_bgr, edge=EDGE, min_area=1500)
+    print(f"Gap from {EDGE} edge to object: {gap_px} pixels")
+
+    # Convert pixels to centimeters: ground-plane lookup on the block's bottom row
+    # (ranging.py, "sense_distance" calibration; measured for EDGE = 'bottom')
+    img_h, img_w = img_bgr.shape[:2]
+    ranger = get_ranging("sense_distance", (img_w, img_h))
+    gap_cm = float(ranger.distance(img_h - gap_px))
+
+    print(f"Gap from {EDGE} edge to object: {gap_px} pixels ({gap_cm:.2f} cm)")
+
+    # Save an annotated image so you can verify visually
+    annotated_name = filename.replace(".jpg", f"_annotated_{EDGE}.jpg")
+    cv2.imwrite(annotated_name, annotated)
+    print(f"Annotated preview saved as {annotated_name}")
+
+    # Keep measuring for this many seconds after the still, e.g. while driving up
+    # to the block: edges only in the EDGE_BAND of the frame nearest EDGE, no annotation
+    WATCH_SECONDS = 0
+    EDGE_BAND = 0.5
+    start = time.time()
+    measured = 0
+    while time.time() - start < WATCH_SECONDS:
+        frame = cv2.cvtColor(picam2.capture_array(), cv2.COLOR_RGB2BGR)
+        gap_px, _ = measure_edge_gap(frame, edge=EDGE, min_area=1500, band=EDGE_BAND)
+        measured += 1
+        print(f"Gap {gap_px} pixels ({float(ranger.distance(img_h - gap_px)):.2f} cm)")
+    if measured:
+        print(f"{measured} measurements, {measured / (time.time() - start):.1f} per second")
+    picam2.stop()
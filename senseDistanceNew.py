@@ -4,10 +4,13 @@ import matplotlib
 matplotlib.use("Agg")  # save plots to files
 import matplotlib.pyplot as plt
 import os
+from raster_engine import analyze_rows, confirm_block, peak_stats
+from raster_filters import filter_stack, moving_average
 
 # ---------------- CONFIG ----------------
 IMAGE_PATH = "blocks.jpg"   # <-- set your image filename
 ROW_INDEX = 200             # raster line (horizontal slice)
+CONFIRM_ROWS = range(100, 301, 10)  # rows voted on to confirm the dominant color
 OUT_DIR = "raster_outputs_filtered"
 # ----------------------------------------
 
@@ -30,15 +33,8 @@ def yellow_score_line(R_line, G_line, B_line):
 
 def running_min_max(values):
     """Scan left→right; return (min_val, min_x, max_val, max_x)."""
-    min_val, max_val = 255, 0
-    min_x = max_x = 0
-    for x, v in enumerate(values):
-        v = int(v)
-        if v < min_val:
-            min_val, min_x = v, x
-        if v > max_val:
-            max_val, max_x = v, x
-    return min_val, min_x, max_val, max_x
+    min_val, min_x, max_val, max_x = peak_stats(np.asarray(values))
+    return int(min_val), int(min_x), int(max_val), int(max_x)
 
 
 def save_plot(x, y_arrays, labels, title, out_path):
@@ -58,8 +54,7 @@ def save_plot(x, y_arrays, labels, title, out_path):
 # -------- Filtering Functions ----------
 def low_pass(signal, kernel_size=15):
     """Simple moving average smoothing."""
-    kernel = np.ones(kernel_size) / kernel_size
-    return np.convolve(signal, kernel, mode="same")
+    return moving_average(signal, kernel_size)
 
 
 def high_pass(signal, kernel_size=15):
@@ -85,8 +80,10 @@ if __name__ == "__main__":
     Y = yellow_score_line(R, G, B).astype(float)
 
     # 4) Filtering
-    R_lp, G_lp, B_lp, Y_lp = [low_pass(ch) for ch in [R, G, B, Y]]
-    R_hp, G_hp, B_hp, Y_hp = [high_pass(ch) for ch in [R, G, B, Y]]
+    # all four channels in one call; high-pass reuses the low-pass
+    lp, hp = filter_stack(np.stack([R, G, B, Y]))
+    R_lp, G_lp, B_lp, Y_lp = lp
+    R_hp, G_hp, B_hp, Y_hp = hp
 
     # 5) Peak detection (on low-pass for stability)
     R_min, R_xmin, R_max, R_xmax = running_min_max(R_lp)
@@ -112,6 +109,12 @@ if __name__ == "__main__":
     print(f"YELL.: max={Y_max:.1f} at x={Y_xmax}")
     print(f"==> Dominant peak is {dominant_color} with value {dominant_value:.1f}")
 
+    # Confirm over several raster lines, not just ROW_INDEX
+    rows_result = analyze_rows(rgb, CONFIRM_ROWS)
+    confirm_color, confirm_share, confirm_x = confirm_block(rows_result)
+    print(f"==> Over {len(rows_result['rows'])} rows: {confirm_color} dominates "
+          f"{100 * confirm_share:.0f}% of rows (median peak x={confirm_x})")
+
     # 8) Save plots
     save_plot(
         X,
@@ -0,0 +1,203 @@
+import threading
+import time
+import queue
+from collections import deque
+from concurrent.futures import Future
+
+
+class CommandError(Exception):
+    """The micro:bit answered a command with "err:<reason>"."""
+
+
+class CommandChannel:
+    """Non-blocking command link to the micro:bit.
+
+    send() queues a newline-terminated command and returns a Future right away.
+    A background reader matches "ack:"/"err:" replies to commands in the order
+    they were sent (the micro:bit handles one line at a time), so the Future
+    resolves as soon as the device has finished with the command:
+      - "ack:<text>" -> result is "<text>"
+      - "err:<text>" -> raises CommandError("<text>")
+      - no reply within reply_timeout -> raises TimeoutError
+    A reply that echoes a command ("ack:left" for "left", as show_letters.py
+    does) is matched to that command directly. A command that timed out stays
+    in line for late_window seconds (default 5 * reply_timeout), so its late
+    echoed reply is dropped instead of being taken as the reply to the next
+    command. A reply without an echo goes to the oldest command that has not
+    timed out; replies come in order, so timed-out commands ahead of the one
+    answered are cleared.
+    Any other line the micro:bit prints goes to receive_message().
+    With a stage_timing.StageTimes as timer, write time ("serial_write") and
+    reply round trips ("serial_reply") are recorded.
+    """
+
+    def __init__(self, port="/dev/ttyACM0", baud_rate=115200, reply_timeout=3.0,
+                 verbose=False, ser=None, timer=None, late_window=None):
+        # ser lets you hand in an already opened serial.Serial (or a stand-in)
+        if ser is None:
+            import serial
+            ser = serial.Serial(port, baud_rate, timeout=0.05)
+        self.ser = ser
+        self.reply_timeout = reply_timeout
+        self.late_window = 5 * reply_timeout if late_window is None else late_window
+        self.verbose = verbose
+        self.timer = timer
+
+        self._outgoing = queue.Queue()
+        self._pending = deque()          # [future, message, time sent, time expired or None]
+        self._lock = threading.Lock()
+        self._messages = queue.Queue()   # unsolicited lines
+        self._running = True
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer.start()
+        self._reader.start()
+
+    # ---------------- public API ----------------
+    def send(self, message, expect_reply=True):
+        """Queue a text command; returns a Future for the device's reply.
+
+        With expect_reply=False the Future resolves once the bytes are written.
+        """
+        future = Future()
+        self._outgoing.put(((message + "\n").encode("utf-8"), message, future, expect_reply))
+        return future
+
+    def send_raw(self, data):
+        """Queue raw bytes that get no reply; the Future resolves once written."""
+        future = Future()
+        self._outgoing.put((bytes(data), None, future, False))
+        return future
+
+    def receive_message(self):
+        """Next line from the micro:bit that was not an ack/err reply, or None."""
+        try:
+            return self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def pending(self):
+        """Number of commands still waiting for a reply."""
+        with self._lock:
+            return sum(1 for entry in self._pending if entry[3] is None)
+
+    def close(self):
+        self._running = False
+        self._outgoing.put(None)
+        self._writer.join(timeout=1)
+        self._reader.join(timeout=1)
+        self._fail_pending(ConnectionError("channel closed"))
+        self.ser.close()
+
+    # ---------------- worker threads ----------------
+    def _write_loop(self):
+        while self._running:
+            item = self._outgoing.get()
+            if item is None:
+                break
+            data, message, future, expect_reply = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if expect_reply:
+                # Register before writing so a fast reply can't beat us to it
+                with self._lock:
+                    self._pending.append([future, message, time.monotonic(), None])
+            try:
+                started = time.perf_counter()
+                self.ser.write(data)
+                if self.timer is not None:
+                    self.timer.record("serial_write", time.perf_counter() - started)
+            except OSError as e:  # serial.SerialException is an OSError
+                if expect_reply:
+                    with self._lock:
+                        self._pending = deque(p for p in self._pending if p[0] is not future)
+                future.set_exception(e)
+                continue
+            if self.verbose and message is not None:
+                print(f"Sent: {message}")
+            if not expect_reply:
+                future.set_result(None)
+
+    def _read_loop(self):
+        buffer = b""
+        while self._running:
+            try:
+                chunk = self.ser.readline()
+            except OSError as e:  # serial.SerialException is an OSError
+                self._fail_pending(e)
+                break
+            if chunk:
+                buffer += chunk
+                if buffer.endswith(b"\n"):
+                    self._handle_line(buffer.decode("utf-8", errors="ignore").strip())
+                    buffer = b""
+            self._expire_pending()
+
+    def _handle_line(self, line):
+        if not line:
+            return
+        if line.startswith("ack:") or line.startswith("err:"):
+            entry = self._match_reply(line[4:])
+            if entry is None:
+                return
+            future, message, sent, expired = entry
+            if expired is not None:
+                # Late reply to a command that already failed with TimeoutError
+                if self.verbose:
+                    print(f"Late reply to {message}: {line} ({time.monotonic() - sent:.3f} s), dropped")
+                return
+            if self.timer is not None:
+                self.timer.record("serial_reply", time.monotonic() - sent)
+            if self.verbose:
+                print(f"Reply to {message}: {line} ({time.monotonic() - sent:.3f} s)")
+            if line.startswith("ack:"):
+                future.set_result(line[4:])
+            else:
+                future.set_exception(CommandError(line[4:]))
+        else:
+            self._messages.put(line)
+
+    def _match_reply(self, text):
+        """Take the pending entry a reply belongs to off the queue (None if nothing is waiting)."""
+        echo = text.strip().lower()
+        with self._lock:
+            for i, entry in enumerate(self._pending):
+                message = entry[1]
+                if message is not None and message.strip().lower() == echo:
+                    # Replies come in order: timed-out commands before this one were never answered
+                    for _ in range(i):
+                        if self._pending[0][3] is None:
+                            break
+                        self._pending.popleft()
+                    if self._pending[0] is entry:
+                        return self._pending.popleft()
+                    self._pending.remove(entry)
+                    return entry
+            # No echo: the oldest command still waiting gets it. If every command
+            # has timed out, the last one takes (and drops) the late reply.
+            while len(self._pending) > 1 and self._pending[0][3] is not None:
+                self._pending.popleft()
+            return self._pending.popleft() if self._pending else None
+
+    def _expire_pending(self):
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for entry in self._pending:
+                if entry[3] is None and now - entry[2] > self.reply_timeout:
+                    entry[3] = now
+                    expired.append(entry)
+            # Stop waiting for late replies to commands that timed out long ago
+            while self._pending and self._pending[0][3] is not None and now - self._pending[0][3] > self.late_window:
+                self._pending.popleft()
+        for future, message, sent, _ in expired:
+            future.set_exception(TimeoutError(f"no reply to {message!r} after {self.reply_timeout} s"))
+
+    def _fail_pending(self, error):
+        with self._lock:
+            entries = list(self._pending)
+            self._pending.clear()
+        for future, message, sent, _ in entries:
+            if not future.done():
+                future.set_exception(error)
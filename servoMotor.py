@@ -3,6 +3,18 @@ command = "sm"  # "sm" (servo) | "dc" (PWM DC) | "dd" (digital DC)
 data1 = 0       # left motor/servo control
 data2 = 0       # right motor/servo control
 
+# --- Binary command frames from the Pi (encoder is frame_protocol.py) ---
+# [0xA5][cmd][data1 lo][data1 hi][data2 lo][data2 hi][crc8]
+# cmd: 1 = "sm", 2 = "dc", 3 = "dd"; data1/data2 are signed 16-bit little endian
+FRAME_SYNC = 0xA5
+FRAME_SIZE = 7
+COMMANDS = ["", "sm", "dc", "dd"]
+rx_frame = []   # bytes of the frame being received
+
+serial.redirect_to_usb()
+serial.set_baud_rate(BaudRate.BAUD_RATE115200)
+serial.set_rx_buffer_size(128)
+
 
 # Helper: clamp a value into [lo, hi]
 def clamp(v, lo, hi):
@@ -18,11 +30,53 @@ def write_pwm(pin, value):
     pins.analog_write_pin(pin, clamp(value, 0, 1023))
 
 
-# Main loop
-def on_forever():
-    # Read the globals (replace these with your own input sources later)
-    # command, data1, data2 are already globals; no assignment here so no 'global' needed
+# Helper: CRC-8 (poly 0x07, init 0) over rx_frame[start:end]
+def crc8(start, end):
+    crc = 0
+    for i in range(start, end):
+        crc = crc ^ rx_frame[i]
+        for bit in range(8):
+            if crc & 0x80:
+                crc = ((crc << 1) ^ 0x07) & 0xFF
+            else:
+                crc = (crc << 1) & 0xFF
+    return crc
+
+
+# Helper: two bytes (little endian) -> signed 16-bit number
+def int16(lo, hi):
+    value = lo + hi * 256
+    if value >= 32768:
+        value = value - 65536
+    return value
+
+
+# Decode whatever bytes have arrived; every valid frame is applied right away
+def read_frames():
+    global command, data1, data2, rx_frame
+    buf = serial.read_buffer(0)
+    for i in range(len(buf)):
+        b = buf[i]
+        if len(rx_frame) == 0 and b != FRAME_SYNC:
+            continue  # hunting for the start of a frame
+        rx_frame.append(b)
+        if len(rx_frame) < FRAME_SIZE:
+            continue
+        if crc8(1, 6) == rx_frame[6] and rx_frame[1] >= 1 and rx_frame[1] <= 3:
+            command = COMMANDS[rx_frame[1]]
+            data1 = int16(rx_frame[2], rx_frame[3])
+            data2 = int16(rx_frame[4], rx_frame[5])
+            rx_frame = []
+            apply_command()
+        else:
+            # Bad frame: drop the sync byte and resync on the next one we hold
+            rx_frame.pop(0)
+            while len(rx_frame) > 0 and rx_frame[0] != FRAME_SYNC:
+                rx_frame.pop(0)
 
+
+# Drive the outputs from command, data1, data2
+def apply_command():
     if command == "sm":
         # SERVO mode:
         # data1 = which servo (1->P13, 2->P14, 3->P15)
@@ -90,6 +144,11 @@ def on_forever():
             pins.digital_write_pin(DigitalPin.P12, 0)
             pins.digital_write_pin(DigitalPin.P16, 0)
 
+
+# Main loop
+def on_forever():
+    read_frames()
+    apply_command()
     # Small delay to avoid saturating the CPU/PWM hardware
     basic.pause(10)
 
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Per-stage latency histograms and counters for the live pipelines.
+#
+#   timings = StageTimes("timings.prom", every=10)
+#   with timings.stage("blur"):
+#       ...
+#   timings.count("frames")
+#   timings.maybe_export()       # rewrites the file at most every 10 s
+#
+# Each stage keeps a fixed-bucket histogram (0.1 ms doubling up to ~6.5 s,
+# plus +Inf), a sum and a max, so recording costs a timer read and a bucket
+# increment no matter how long the robot runs. p50/p99 are estimated from the
+# buckets the way Prometheus' histogram_quantile does. The export file is
+# Prometheus text format when its name ends in .prom (point a node_exporter
+# textfile collector at it), JSON otherwise.
+
+BUCKETS = 0.0001 * 2.0 ** np.arange(17)   # upper bounds in seconds: 0.1 ms .. 6.55 s
+
+
+class _Stage:
+    __slots__ = ("times", "name", "start")
+
+    def __init__(self, times, name):
+        self.times = times
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.times.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.times.record(self.name, self.times.clock() - self.start)
+        return False
+
+
+class _Histogram:
+    def __init__(self, n):
+        self.buckets = np.zeros(n + 1, np.int64)   # last one is +Inf
+        self.sum = 0.0
+        self.max = 0.0
+        self.count = 0
+
+
+class StageTimes:
+    """Latency histograms per stage name plus plain counters; safe to record from several threads."""
+
+    def __init__(self, path=None, every=10.0, prefix="robot", buckets=BUCKETS, clock=time.perf_counter):
+        self.path = path
+        self.every = every
+        self.prefix = prefix
+        self.bounds = np.asarray(buckets, dtype=float)
+        self.clock = clock
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._last_export = time.monotonic()
+
+    def stage(self, name):
+        """Context manager that times its block into the name histogram."""
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        index = int(np.searchsorted(self.bounds, seconds))
+        with self._lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = _Histogram(len(self.bounds))
+            hist.buckets[index] += 1
+            hist.sum += seconds
+            hist.count += 1
+            if seconds > hist.max:
+                hist.max = seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def quantile(self, name, q):
+        """Estimated q-quantile of a stage in seconds (linear within the bucket), or None."""
+        hist = self.stages.get(name)
+        if hist is None or hist.count == 0:
+            return None
+        cumulative = np.cumsum(hist.buckets)
+        rank = q * hist.count
+        i = int(np.searchsorted(cumulative, rank))
+        if i >= len(self.bounds):
+            # In the +Inf bucket; the largest sample is the best bound we have
+            return hist.max
+        lower = self.bounds[i - 1] if i > 0 else 0.0
+        below = cumulative[i - 1] if i > 0 else 0
+        inside = hist.buckets[i]
+        estimate = lower + (self.bounds[i] - lower) * (rank - below) / inside
+        return min(estimate, hist.max)
+
+    def summary(self):
+        """{"stages": {name: {count, mean/p50/p99/max in ms}}, "counters": {...}}."""
+        with self._lock:
+            names = list(self.stages)
+            counters = dict(self.counters)
+        stages = {}
+        for name in names:
+            hist = self.stages[name]
+            stages[name] = {
+                "count": hist.count,
+                "mean_ms": 1000 * hist.sum / hist.count,
+                "p50_ms": 1000 * self.quantile(name, 0.5),
+                "p99_ms": 1000 * self.quantile(name, 0.99),
+                "max_ms": 1000 * hist.max,
+            }
+        return {"time": time.time(), "stages": stages, "counters": counters}
+
+    def to_prometheus(self):
+        """Prometheus text exposition of every histogram and counter."""
+        metric = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {metric} Latency of each pipeline stage.", f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name, hist in self.stages.items():
+                cumulative = np.cumsum(hist.buckets)
+                for bound, n in zip(self.bounds, cumulative):
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:g}"}} {n}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {hist.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {hist.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {hist.count}')
+            for name, n in self.counters.items():
+                counter = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {counter} counter")
+                lines.append(f"{counter} {n}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """Write the file (atomically, so a collector never reads half of it)."""
+        path = path or self.path
+        if path is None:
+            return
+        if path.endswith(".prom"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.summary(), indent=1)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        self._last_export = time.monotonic()
+
+    def maybe_export(self):
+        """export() if `every` seconds have passed since the last one; cheap to call every frame."""
+        if self.path is not None and time.monotonic() - self._last_export >= self.every:
+            self.export()
+
+    def report(self):
+        """One line per stage for the console."""
+        rows = []
+        for name, s in self.summary()["stages"].items():
+            rows.append(f"{name:<14}{s['count']:>7}  p50 {s['p50_ms']:8.2f} ms  p99 {s['p99_ms']:8.2f} ms"
+                        f"  max {s['max_ms']:8.2f} ms")
+        return "\n".join(rows)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTimes:
+    """Stand-in with the StageTimes interface that records nothing."""
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def record(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def maybe_export(self):
+        pass
+
+
+NULL_TIMES = NullTimes()
@@ -1,35 +1,35 @@
-import serial
 import time
+from serial_channel import CommandChannel, CommandError
 
 # Open the serial port to the Micro:bit
-ser = serial.Serial('/dev/ttyACM0', 115200, timeout=1)
+channel = CommandChannel('/dev/ttyACM0', 115200, reply_timeout=2)
 
 time.sleep(2)  # give the connection a moment
 
 def send_message(message):
-    # Add newline so Micro:bit's uart.readline() can detect end of command
-    ser.write((message + "\n").encode("utf-8"))
-    print("Sent:", message)
+    # The channel adds the newline so Micro:bit's uart.readline() can detect end of command
+    return channel.send(message)
 
 def receive_message():
-    if ser.in_waiting > 0:
-        response = ser.readline().decode("utf-8", errors="ignore").strip()
-        return response
-    return None
+    return channel.receive_message()
 
 try:
     while True:
         command = input("Enter servo position (left, right, center, tcenter, tleft, tright): ")
-        send_message(command)
+        reply = send_message(command)
+
+        # wait for the Micro:bit's ack:/err: reply; returns as soon as it arrives
+        try:
+            print("Micro:bit: ack:" + reply.result())
+        except CommandError as e:
+            print("Micro:bit: err:" + str(e))
+        except TimeoutError:
+            print("Micro:bit: no reply")
 
-        # wait a moment for Micro:bit to respond
-        time.sleep(0.1)
         response = receive_message()
         if response:
             print("Micro:bit:", response)
 
-        time.sleep(1)
-
 except KeyboardInterrupt:
     print("Communication ended.")
-    ser.close()
+    channel.close()
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+import BlockDetect
+from frame_dataset import FrameDataset, FrameDatasetWriter
+
+PATCH = (200, 100, 160, 120)   # (x, y, w, h) of the green block in the raw, upside-down camera image
+
+
+def raw_scene():
+    scene = np.full((BlockDetect.MAIN_SIZE[1], BlockDetect.MAIN_SIZE[0], 3), 60, np.uint8)
+    x, y, w, h = PATCH
+    scene[y:y + h, x:x + w] = (0, 200, 0)
+    return scene
+
+
+def captured(mode):
+    # What capture_frame() hands the scan in each mode
+    scene = raw_scene()
+    if mode == "lores":
+        small = cv2.resize(scene, BlockDetect.LORES_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2YUV_I420)
+    return BlockDetect.prepare_frame(scene)
+
+
+@pytest.mark.parametrize("mode", ["full", "lores"])
+def test_recorded_box_covers_the_block(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(BlockDetect, "DETECT_MODE", mode)
+    green = [c for c in BlockDetect.scan_colors if c[0] == "Green"]
+    frame = captured(mode)
+    detections = BlockDetect.detect_all(frame, green)
+    assert [name for name, box in detections] == ["Green"]
+
+    pixel_format = "YUV420" if mode == "lores" else "BGR"
+    writer = FrameDatasetWriter(str(tmp_path / "ds"), ["Green"], pixel_format=pixel_format)
+    monkeypatch.setattr(BlockDetect, "dataset", writer)
+    BlockDetect.record_frame(frame, 90, detections)
+    writer.close()
+
+    ds = FrameDataset(str(tmp_path / "ds"))
+    saved = ds[0]
+    if pixel_format == "YUV420":
+        saved = cv2.cvtColor(saved, cv2.COLOR_YUV2BGR_I420)
+    (name, (x, y, w, h)), = ds.detections(0)
+    green_pixels = (saved[..., 1] > 150) & (saved[..., 2] < 80)
+    inside = green_pixels[y:y + h, x:x + w]
+    # The box holds (nearly) all of the block and little else
+    assert inside.sum() >= 0.95 * green_pixels.sum()
+    assert inside.mean() >= 0.8
@@ -0,0 +1,25 @@
+import cv2
+import numpy as np
+import pytest
+
+from BlockDetect import color_profiles
+from color_lut import ColorLUT
+
+
+@pytest.mark.parametrize("pixel_format", ["BGR", "RGB"])
+def test_table_agrees_with_inrange_on_a_random_image(pixel_format):
+    lut = ColorLUT(color_profiles, pixel_format, cache_dir=None)
+    img = np.random.default_rng(0).integers(0, 256, (512, 512, 3), dtype=np.uint8)
+    to_hsv = cv2.COLOR_BGR2HSV if pixel_format == "BGR" else cv2.COLOR_RGB2HSV
+    hsv = cv2.cvtColor(img, to_hsv)
+    codes = lut.classify(img)
+    for name, boxes in color_profiles.items():
+        expected = np.zeros(img.shape[:2], bool)
+        for lower, upper in boxes:
+            expected |= cv2.inRange(hsv, lower, upper) > 0
+        got = lut.mask(codes, name) > 0
+        positives = expected.sum()
+        # Uniform noise puts many pixels right on the box edges, where the
+        # 5/6/5-bit quantization decides; misses and false hits both stay small
+        assert (expected & ~got).sum() < 0.05 * positives, name
+        assert (got & ~expected).sum() < 0.05 * positives, name
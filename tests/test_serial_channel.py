@@ -0,0 +1,58 @@
+import queue
+
+import pytest
+
+from serial_channel import CommandChannel
+
+
+class FakeSerial:
+    """Answers every written line with reply(line), or not at all for lines in lost."""
+
+    def __init__(self, reply, lost=()):
+        self.reply = reply
+        self.lost = set(lost)
+        self.replies = queue.Queue()
+
+    def write(self, data):
+        line = data.decode().strip()
+        if line in self.lost:
+            self.lost.discard(line)
+        else:
+            self.replies.put(self.reply(line).encode() + b"\n")
+
+    def readline(self):
+        try:
+            return self.replies.get(timeout=0.01)
+        except queue.Empty:
+            return b""
+
+    def close(self):
+        pass
+
+
+def open_channel(ser):
+    return CommandChannel(ser=ser, reply_timeout=0.2, late_window=5.0)
+
+
+def test_lost_unechoed_reply_does_not_starve_later_commands():
+    channel = open_channel(FakeSerial(lambda line: "ack:ok", lost={"H9"}))
+    try:
+        with pytest.raises(TimeoutError):
+            channel.send("H9").result(timeout=2)
+        for i in range(5):
+            assert channel.send(f"H{i}").result(timeout=2) == "ok"
+        assert channel.pending() == 0
+    finally:
+        channel.close()
+
+
+def test_late_echoed_reply_is_not_taken_by_the_next_command():
+    ser = FakeSerial(lambda line: f"ack:{line}", lost={"left"})
+    channel = open_channel(ser)
+    try:
+        with pytest.raises(TimeoutError):
+            channel.send("left").result(timeout=2)
+        ser.replies.put(b"ack:left\n")
+        assert channel.send("right").result(timeout=2) == "right"
+    finally:
+        channel.close()
@@ -0,0 +1,65 @@
+import cv2
+
+from color_lut import CACHE_DIR, ColorLUT
+
+# Color detection straight on the camera's low-resolution YUV420 stream.
+#
+# Picamera2 can deliver a small "lores" YUV420 stream next to the main one.
+# Detection runs on that: each pixel's (Y, U, V) indexes a lookup table built
+# once from the HSV boxes, so there is no RGB transfer and no color
+# conversion per frame. Classification runs at chroma resolution (half the
+# lores size each way) and boxes are scaled back to main-stream pixels, so
+# callers keep working in the coordinates they always have. The full
+# resolution frame is only captured when something needs to be measured on it.
+#
+#   picam2.configure(lores_config(picam2, (1280, 720), (640, 360)))
+#   buf = picam2.capture_array("lores")
+#   box = classifier.detect(buf, "Green", (1280, 720))
+
+
+def lores_config(picam2, main_size, lores_size, main_format="RGB888", still=False):
+    """Camera configuration with a main stream and a YUV420 lores stream."""
+    create = picam2.create_still_configuration if still else picam2.create_preview_configuration
+    return create(main={"size": main_size, "format": main_format},
+                  lores={"size": lores_size, "format": "YUV420"})
+
+
+class YuvClassifier(ColorLUT):
+    """Per-color HSV boxes turned into one (Y, U, V) -> color-bits lookup table.
+
+    ranges maps a color name to a list of (lower, upper) HSV boxes in OpenCV
+    units; several boxes per color cover hues that wrap (red). Up to 8 colors;
+    each gets one bit so a single lookup classifies every color at once.
+    bits is the table resolution per channel (6 -> 64^3 entries, 256 KB).
+    The table comes from color_lut.py and is cached on disk.
+    """
+
+    def __init__(self, ranges, bits=6, min_area=800, cache_dir=CACHE_DIR):
+        super().__init__(ranges, "YUV420", bits, cache_dir)
+        self.min_area = min_area        # in main-stream pixels, like detect_single_color
+
+    def boxes(self, codes, name, main_size, flip_code=None):
+        """Main-stream (x, y, w, h) boxes of one color in classify() output, largest first.
+
+        No dilation: a chroma sample is several main pixels wide, so growing
+        the mask by one sample would visibly inflate every box.
+        """
+        mask = self.mask(codes, name)
+        if flip_code is not None:
+            mask = cv2.flip(mask, flip_code)
+        sx = main_size[0] / codes.shape[1]
+        sy = main_size[1] / codes.shape[0]
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        found = []
+        for c in contours:
+            area = cv2.contourArea(c) * sx * sy
+            if area > self.min_area:
+                x, y, w, h = cv2.boundingRect(c)
+                found.append((area, (int(x * sx), int(y * sy), int(round(w * sx)), int(round(h * sy)))))
+        found.sort(key=lambda item: -item[0])
+        return [box for area, box in found]
+
+    def detect(self, buf, name, main_size, flip_code=None):
+        """Largest box of one color in main-stream pixels, or None."""
+        found = self.boxes(self.classify(buf), name, main_size, flip_code)
+        return found[0] if found else None